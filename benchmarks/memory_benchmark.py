@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# ============================================================================
+# Media Dashboard — Memory Benchmark
+# Runs the qBittorrent and Overseerr fetchers in-process against the mock
+# upstreams and reports the peak Python heap allocated by each poll, plus
+# how much stays allocated between polls (mostly the torrent mirror). The first poll is the full
+# sync/maindata download; later ones are deltas.
+#
+# Usage: python benchmarks/memory_benchmark.py --torrents 10000
+#        DASHBOARD_STREAM_JSON=0 python benchmarks/memory_benchmark.py   (without incremental parsing)
+# ============================================================================
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import aiohttp
+
+from mock_upstreams import MockConfig, MockUpstreams
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'execution'))
+
+def mb(value):
+    return round(value / 1024 / 1024, 2)
+
+async def measure(label, poll, polls):
+    peaks = []
+    for _ in range(polls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = await poll()
+        if 'error' in result:
+            raise RuntimeError(f"{label}: {result['error']}")
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    return {
+        'first_poll_peak_mb': mb(peaks[0]),
+        'later_poll_peak_mb': mb(max(peaks[1:])) if len(peaks) > 1 else None
+    }
+
+async def run(args):
+    upstreams = MockUpstreams(MockConfig(latency=0, jitter=0, torrents=args.torrents, errored=args.errored,
+                                         requests=args.requests))
+    await upstreams.start()
+    os.environ.update(upstreams.env())
+    os.environ['MEDIA_DASHBOARD_CACHE_DIR'] = tempfile.mkdtemp(prefix='media-dashboard-bench-')
+
+    # Imported after the environment points at the mocks
+    import fetch_qbittorrent
+    from fetch_overseerr import fetch_overseerr_data
+    from json_stream import streaming
+
+    tracemalloc.start()
+    try:
+        async with aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as session:
+            baseline = tracemalloc.get_traced_memory()[0]
+            qbittorrent = await measure('qBittorrent', lambda: fetch_qbittorrent.fetch_qbittorrent_data(session),
+                                        args.polls)
+            qbittorrent['torrents'] = len(fetch_qbittorrent.get_client(session).torrents)
+            qbittorrent['retained_mb'] = mb(tracemalloc.get_traced_memory()[0] - baseline)
+
+            overseerr = await measure('Overseerr', lambda: fetch_overseerr_data(session), args.polls)
+    finally:
+        tracemalloc.stop()
+        await upstreams.stop()
+
+    return {'streaming': streaming(), 'qbittorrent': qbittorrent, 'overseerr': overseerr}
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure per-poll memory of the fetchers.')
+    parser.add_argument('--torrents', type=int, default=10000)
+    parser.add_argument('--errored', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=50, help='pending Overseerr requests')
+    parser.add_argument('--polls', type=int, default=5)
+    parser.add_argument('--output', help='also write the result to this JSON file')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == '__main__':
+    main()
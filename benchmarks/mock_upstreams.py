@@ -0,0 +1,327 @@
+import asyncio
+import random
+import time
+from collections import Counter
+
+from aiohttp import web
+
+# Local stand-ins for Plex, qBittorrent, Sonarr, Radarr and Overseerr. They
+# answer the endpoints the fetch_* modules call with generated data of a
+# configurable size, after a configurable delay, failing at a configurable
+# rate, and count every request they receive.
+
+TORRENT_STATES = ('downloading', 'stalledDL', 'uploading', 'stalledUP', 'pausedUP', 'queuedDL')
+
+# The mock Plex library gains an item this often (seconds), so incremental
+# recently-added polls sometimes have something to fetch
+LIBRARY_ADD_INTERVAL = 30
+
+
+class MockConfig:
+    def __init__(self, latency=0.02, jitter=0.01, failure_rate=0.0, torrents=1000, errored=50,
+                 requests=50, queue=30, sessions=1, seed=1):
+        self.latency = latency          # seconds added to every response
+        self.jitter = jitter            # +/- random seconds on top of latency
+        self.failure_rate = failure_rate  # fraction of requests answered with HTTP 500
+        self.torrents = torrents
+        self.errored = errored
+        self.requests = requests
+        self.queue = queue
+        self.sessions = sessions
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class MockUpstreams:
+    def __init__(self, config):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.counts = Counter()  # (service, endpoint) -> requests
+        self.runners = []
+        self.urls = {}
+
+        self.torrents = self._make_torrents()
+        self.rid = 0
+        self.started = int(time.time())
+
+    # ── Data ──────────────────────────────────────────────────────────────
+
+    def _make_torrents(self):
+        torrents = {}
+        now = int(time.time())
+        for i in range(self.config.torrents):
+            t_hash = f"{i:040x}"
+            errored = i < self.config.errored
+            torrents[t_hash] = {
+                'name': f"Some.Linux.Distro.{i}.iso",
+                'state': 'error' if errored else self.random.choice(TORRENT_STATES),
+                'progress': self.random.random(),
+                'dlspeed': self.random.randint(0, 5_000_000),
+                'upspeed': self.random.randint(0, 1_000_000),
+                'added_on': now - i * 60,
+                'tracker': '' if errored else 'http://tracker.example/announce',
+                'size': self.random.randint(10**8, 10**10),
+                'category': 'linux',
+                'save_path': '/downloads',
+                'ratio': self.random.random() * 3
+            }
+        return torrents
+
+    def _server_state(self):
+        return {
+            'dl_info_speed': self.random.randint(0, 50_000_000),
+            'up_info_speed': self.random.randint(0, 10_000_000),
+            'dl_info_data': 123_456_789_000,
+            'up_info_data': 98_765_432_000
+        }
+
+    # ── Plumbing ──────────────────────────────────────────────────────────
+
+    def _handler(self, service, endpoint, func):
+        async def handler(request):
+            self.counts[(service, endpoint)] += 1
+            delay = self.config.latency + self.random.uniform(-self.config.jitter, self.config.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.random.random() < self.config.failure_rate:
+                return web.Response(status=500, text='mock failure')
+            return await func(request)
+        return handler
+
+    def _app(self, service, routes):
+        app = web.Application()
+        for method, path, func in routes:
+            app.router.add_route(method, path, self._handler(service, path, func))
+        return app
+
+    async def _serve(self, name, app):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        self.runners.append(runner)
+        self.urls[name] = f"http://127.0.0.1:{port}"
+
+    async def start(self):
+        await self._serve('plex', self._app('plex', [
+            ('GET', '/library/all', self.plex_library),
+            ('GET', '/library/sections', self.plex_sections),
+            ('GET', '/library/sections/{key}/all', self.plex_library),
+            ('GET', '/hubs/home/recentlyAdded', self.plex_library),
+            ('GET', '/status/sessions', self.plex_sessions),
+            ('GET', '/:/websockets/notifications', self.plex_notifications)
+        ]))
+        await self._serve('qbittorrent', self._app('qbittorrent', [
+            ('POST', '/api/v2/auth/login', self.qbit_login),
+            ('GET', '/api/v2/sync/maindata', self.qbit_maindata),
+            ('GET', '/api/v2/torrents/info', self.qbit_info),
+            ('GET', '/api/v2/torrents/trackers', self.qbit_trackers),
+            ('GET', '/api/v2/transfer/info', self.qbit_transfer),
+            ('POST', '/api/v2/torrents/{action}', self.qbit_action)
+        ]))
+        for name in ('sonarr', 'radarr'):
+            await self._serve(name, self._app(name, [
+                ('GET', '/api/v3/health', self.arr_health),
+                ('GET', '/api/v3/queue', self.arr_queue)
+            ]))
+        await self._serve('overseerr', self._app('overseerr', [
+            ('GET', '/api/v1/request', self.overseerr_requests),
+            ('GET', '/api/v1/{media_type}/{tmdb_id}', self.overseerr_details)
+        ]))
+
+    async def stop(self):
+        for runner in self.runners:
+            await runner.cleanup()
+
+    def env(self):
+        # Environment pointing the dashboard at these stand-ins
+        return {
+            'PLEX_URL': self.urls['plex'],
+            'PLEX_TOKEN': 'mock-token',
+            'QBITTORRENT_URL': self.urls['qbittorrent'],
+            'QBITTORRENT_USERNAME': 'admin',
+            'QBITTORRENT_PASSWORD': 'adminadmin',
+            'SONARR_URL': self.urls['sonarr'],
+            'SONARR_API_KEY': 'mock-key',
+            'RADARR_URL': self.urls['radarr'],
+            'RADARR_API_KEY': 'mock-key',
+            'OVERSEERR_URL': self.urls['overseerr'],
+            'OVERSEERR_API_KEY': 'mock-key'
+        }
+
+    def request_counts(self):
+        counts = {}
+        for (service, endpoint), count in sorted(self.counts.items()):
+            counts.setdefault(service, {})[endpoint] = count
+        return counts
+
+    # ── Plex ──────────────────────────────────────────────────────────────
+
+    async def plex_library(self, request):
+        # Newest first. Item k was added at started + k * LIBRARY_ADD_INTERVAL,
+        # so the library stays the same between polls apart from new items;
+        # addedAt>> keeps only those added after it, as Plex does.
+        lib_type = request.query.get('type', '1')
+        limit = int(request.query.get('limit', request.query.get('X-Plex-Container-Size', 5)))
+        after = request.query.get('addedAt>>')
+        newest = (int(time.time()) - self.started) // LIBRARY_ADD_INTERVAL
+        metadata = []
+        for k in range(newest, newest - limit, -1):
+            added_at = self.started + k * LIBRARY_ADD_INTERVAL
+            if after is not None and added_at <= int(after):
+                break
+            key = 100000 + k
+            item = {
+                'ratingKey': str(key),
+                'title': f"Item {k}",
+                'year': 2000 + k % 25,
+                'addedAt': added_at,
+                'thumb': f"/library/metadata/{key}/thumb/{added_at}"
+            }
+            if lib_type == '4':
+                item.update({
+                    'type': 'episode',
+                    'grandparentTitle': f"Show {k}",
+                    'parentTitle': 'Season 1',
+                    'grandparentThumb': f"/library/metadata/{key + 100000}/thumb/{added_at}"
+                })
+            else:
+                item['type'] = 'movie'
+            metadata.append(item)
+        return web.json_response({'MediaContainer': {'size': len(metadata), 'Metadata': metadata}})
+
+    async def plex_sections(self, request):
+        return web.json_response({'MediaContainer': {'Directory': [
+            {'key': '1', 'type': 'movie', 'title': 'Movies'},
+            {'key': '2', 'type': 'show', 'title': 'TV Shows'}
+        ]}})
+
+    async def plex_sessions(self, request):
+        metadata = [{
+            'sessionKey': str(i),
+            'type': 'movie',
+            'title': f"Playing {i}",
+            'year': 2020,
+            'thumb': f"/library/metadata/{3000 + i}/thumb/1",
+            'User': {'title': f"user{i}", 'thumb': f"https://plex.tv/users/{i:016x}/avatar?c=1"},
+            'Player': {'state': 'playing'}
+        } for i in range(self.config.sessions)]
+        return web.json_response({'MediaContainer': {'size': len(metadata), 'Metadata': metadata}})
+
+    async def plex_notifications(self, request):
+        # Accepts the dashboard's notification socket and keeps it open; no
+        # events are sent, so sessions only change on the resync poll
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        async for _ in ws:
+            pass
+        return ws
+
+    # ── qBittorrent ───────────────────────────────────────────────────────
+
+    async def qbit_login(self, request):
+        return web.Response(text='Ok.', headers={'Set-Cookie': 'SID=mock-sid; HttpOnly; path=/'})
+
+    async def qbit_maindata(self, request):
+        rid = int(request.query.get('rid', 0))
+        self.rid += 1
+        if rid == 0:
+            return web.json_response({
+                'rid': self.rid,
+                'full_update': True,
+                'torrents': self.torrents,
+                'server_state': self._server_state()
+            })
+
+        # A delta: a few torrents moved on since the last sync
+        changed = {}
+        for t_hash in self.random.sample(list(self.torrents), min(20, len(self.torrents))):
+            torrent = self.torrents[t_hash]
+            torrent['progress'] = min(1.0, torrent['progress'] + 0.01)
+            torrent['dlspeed'] = self.random.randint(0, 5_000_000)
+            changed[t_hash] = {'progress': torrent['progress'], 'dlspeed': torrent['dlspeed']}
+        return web.json_response({'rid': self.rid, 'torrents': changed, 'server_state': self._server_state()})
+
+    async def qbit_info(self, request):
+        limit = int(request.query.get('limit', len(self.torrents)))
+        torrents = [{'hash': h, **t} for h, t in list(self.torrents.items())[:limit]]
+        return web.json_response(torrents)
+
+    async def qbit_trackers(self, request):
+        t_hash = request.query.get('hash', '')
+        torrent = self.torrents.get(t_hash, {})
+        msg = 'Tracker is down' if torrent.get('state') == 'error' else ''
+        return web.json_response([
+            {'url': '** [DHT] **', 'msg': ''},
+            {'url': 'http://tracker.example/announce', 'msg': msg}
+        ])
+
+    async def qbit_transfer(self, request):
+        return web.json_response(self._server_state())
+
+    async def qbit_action(self, request):
+        return web.Response(text='')
+
+    # ── Sonarr / Radarr ───────────────────────────────────────────────────
+
+    async def arr_health(self, request):
+        return web.json_response([
+            {'type': 'warning', 'message': 'Indexer unavailable', 'source': 'IndexerStatusCheck'}
+        ])
+
+    async def arr_queue(self, request):
+        page = int(request.query.get('page', 1))
+        page_size = int(request.query.get('pageSize', 10))
+        start = (page - 1) * page_size
+        records = [{
+            'id': i,
+            'seriesId': i // 3,
+            'movieId': i,
+            'title': f"Release.{i}.1080p",
+            'status': 'downloading' if i % 2 else 'queued',
+            'protocol': 'torrent',
+            'series': {'title': f"Series {i // 3}"},
+            'movie': {'title': f"Movie {i}"}
+        } for i in range(start, min(start + page_size, self.config.queue))]
+        return web.json_response({
+            'page': page,
+            'pageSize': page_size,
+            'totalRecords': self.config.queue,
+            'records': records
+        })
+
+    # ── Overseerr ─────────────────────────────────────────────────────────
+
+    async def overseerr_requests(self, request):
+        take = int(request.query.get('take', 20))
+        results = [{
+            'id': i,
+            'status': 1,
+            'type': 'movie' if i % 2 else 'tv',
+            'createdAt': '2024-01-01T12:00:00.000Z',
+            'media': {'tmdbId': 10_000 + i},
+            'requestedBy': {'email': f"user{i}@example.com"}
+        } for i in range(min(take, self.config.requests))]
+        return web.json_response({'pageInfo': {'results': self.config.requests}, 'results': results})
+
+    async def overseerr_details(self, request):
+        tmdb_id = request.match_info['tmdb_id']
+        return web.json_response({'title': f"Title {tmdb_id}", 'posterPath': f"/poster{tmdb_id}.jpg"})
+
+
+async def main():
+    # Run the stand-ins on their own, e.g. to point a dev server at them
+    upstreams = MockUpstreams(MockConfig())
+    await upstreams.start()
+    for key, value in upstreams.env().items():
+        print(f"{key}={value}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await upstreams.stop()
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# ============================================================================
+# Media Dashboard — Load Benchmark
+# Starts mock upstreams, runs the dashboard against them in a subprocess and
+# hammers /api/data with N concurrent pollers. Reports request latency,
+# upstream request counts and server memory, and saves them as JSON so runs
+# can be compared between releases.
+#
+# Usage: python benchmarks/run_benchmark.py --clients 50 --torrents 10000
+#        python benchmarks/run_benchmark.py --binary dist/media-dashboard/media-dashboard
+#        python benchmarks/run_benchmark.py --compare benchmarks/results/old.json
+# ============================================================================
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+from mock_upstreams import MockConfig, MockUpstreams
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(PROJECT_ROOT, 'execution')
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def process_memory(pid):
+    # Current and peak resident set size in MB, from /proc (Linux only)
+    memory = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM'):
+                    memory['rss_mb' if key == 'VmRSS' else 'peak_rss_mb'] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return memory
+
+async def wait_until_up(url, timeout):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return time.monotonic()
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"Dashboard did not come up within {timeout}s")
+
+async def poller(session, url, interval, stop_at, latencies, errors):
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        try:
+            async with session.get(url, headers={'Accept-Encoding': 'gzip, br'}) as resp:
+                await resp.read()
+                if resp.status not in (200, 304):
+                    errors.append(resp.status)
+        except aiohttp.ClientError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - started) * 1000)
+        if interval:
+            await asyncio.sleep(interval)
+
+async def run(args):
+    config = MockConfig(latency=args.latency / 1000, jitter=args.jitter / 1000, failure_rate=args.failure_rate,
+                        torrents=args.torrents, errored=args.errored, requests=args.requests,
+                        queue=args.queue, sessions=args.sessions)
+    upstreams = MockUpstreams(config)
+    await upstreams.start()
+
+    port = free_port()
+    env = {**os.environ, **upstreams.env(), 'PORT': str(port),
+           'MEDIA_DASHBOARD_CACHE_DIR': tempfile.mkdtemp(prefix='media-dashboard-bench-')}
+    started = time.monotonic()
+    # A PyInstaller build instead of the source tree, to compare startup
+    # between the onefile and onedir packagings
+    command = [os.path.abspath(args.binary)] if args.binary else [sys.executable, 'app.py']
+    server = subprocess.Popen(command, cwd=APP_DIR, env=env,
+                              stdout=subprocess.DEVNULL if not args.verbose else None, stderr=subprocess.STDOUT)
+
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        ready_at = await wait_until_up(f"{base_url}/api/data", timeout=30)
+        startup_seconds = ready_at - started
+
+        await asyncio.sleep(args.warmup)
+        upstreams.counts.clear()
+
+        latencies, errors = [], []
+        stop_at = time.monotonic() + args.duration
+        connector = aiohttp.TCPConnector(limit=args.clients)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*[
+                poller(session, f"{base_url}/api/data", args.interval, stop_at, latencies, errors)
+                for _ in range(args.clients)
+            ])
+
+        upstream_counts = upstreams.request_counts()
+        upstream_total = sum(sum(endpoints.values()) for endpoints in upstream_counts.values())
+
+        return {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'label': args.label,
+            'settings': {
+                'clients': args.clients,
+                'duration': args.duration,
+                'interval': args.interval,
+                'binary': args.binary,
+                'upstream': config.as_dict()
+            },
+            'startup_seconds': round(startup_seconds, 3),
+            'requests': len(latencies),
+            'errors': len(errors),
+            'requests_per_second': round(len(latencies) / args.duration, 1),
+            'latency_ms': {
+                'p50': percentile(latencies, 50),
+                'p90': percentile(latencies, 90),
+                'p99': percentile(latencies, 99),
+                'max': max(latencies) if latencies else None,
+                'mean': statistics.fmean(latencies) if latencies else None
+            },
+            'upstream_requests': upstream_total,
+            'upstream_requests_per_second': round(upstream_total / args.duration, 1),
+            'upstream_by_endpoint': upstream_counts,
+            'memory': process_memory(server.pid)
+        }
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        await upstreams.stop()
+
+def print_summary(result, baseline=None):
+    def line(name, value, base):
+        if value is None:
+            return
+        text = f"  {name:<28}{value:>12.2f}"
+        if base:
+            text += f"   ({(value - base) / base * 100:+.1f}% vs baseline)"
+        print(text)
+
+    def base(*keys):
+        value = baseline
+        for key in keys:
+            value = (value or {}).get(key)
+        return value
+
+    print(f"\n  {result['requests']} requests from {result['settings']['clients']} clients, {result['errors']} errors")
+    line('latency p50 (ms)', result['latency_ms']['p50'], base('latency_ms', 'p50'))
+    line('latency p99 (ms)', result['latency_ms']['p99'], base('latency_ms', 'p99'))
+    line('requests/s', result['requests_per_second'], base('requests_per_second'))
+    line('upstream requests/s', result['upstream_requests_per_second'], base('upstream_requests_per_second'))
+    line('startup (s)', result['startup_seconds'], base('startup_seconds'))
+    line('peak RSS (MB)', result['memory'].get('peak_rss_mb'), base('memory', 'peak_rss_mb'))
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the dashboard against mock upstreams.')
+    parser.add_argument('--clients', type=int, default=10, help='concurrent pollers')
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between polls per client (0 = flat out)')
+    parser.add_argument('--duration', type=float, default=20, help='seconds to measure for')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds to let the collector settle first')
+    parser.add_argument('--latency', type=float, default=20, help='upstream latency in ms')
+    parser.add_argument('--jitter', type=float, default=10, help='upstream latency jitter in ms')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of upstream requests that fail')
+    parser.add_argument('--torrents', type=int, default=1000)
+    parser.add_argument('--errored', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=50, help='pending Overseerr requests')
+    parser.add_argument('--queue', type=int, default=30, help='Sonarr/Radarr queue size')
+    parser.add_argument('--sessions', type=int, default=1, help='active Plex sessions')
+    parser.add_argument('--label', default='', help='free-form note stored with the result')
+    parser.add_argument('--output', help='result file (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', help='earlier result file to compare against')
+    parser.add_argument('--binary', help='run this frozen build instead of app.py')
+    parser.add_argument('--verbose', action='store_true', help='show the dashboard server output')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_summary(result, baseline)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"  Saved: {output}")
+
+if __name__ == '__main__':
+    main()
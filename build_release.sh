@@ -56,7 +56,10 @@ if [ -f execution/static/404.html ]; then
     mv execution/static/404.html execution/templates/404.html
 fi
 
-echo "  Assets copied."
+# Write .br/.gz next to each asset and the route manifest the server reads
+python3 execution/static_files.py execution/static
+
+echo "  Assets copied and precompressed."
 echo ""
 
 # ── 3. Assemble Release Directory ───────────────────────────────────────────
@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+
+# Page size for paginated list endpoints when the client doesn't ask
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+def parse_sections(value):
+    # "qbittorrent.transfer_info,plex.active_sessions" -> [('qbittorrent', 'transfer_info'), ('plex', 'active_sessions')]
+    # A bare service name selects the whole service.
+    sections = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        service, _, field = part.partition('.')
+        sections.append((service, field or None))
+    return sections
+
+def select_sections(data, sections):
+    selected = {}
+    for service, field in sections:
+        if service not in data:
+            continue
+        if field is None:
+            selected[service] = data[service]
+        elif isinstance(data[service], dict) and field in data[service]:
+            selected.setdefault(service, {})[field] = data[service][field]
+    return selected
+
+def item_key(item):
+    # Stable identity of a list entry, used to anchor cursors
+    if isinstance(item, dict):
+        return item.get('hash') or item.get('id')
+    return None
+
+def encode_cursor(offset, key):
+    raw = json.dumps({'o': offset, 'k': key}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data['o'])
+        if offset < 0:
+            return None
+        return offset, data.get('k')
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+def paginate(items, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    # Cursors point just past the last item returned. When that item is still
+    # in the list, paging resumes after it even if entries were added or
+    # removed in front of it; otherwise it falls back to the saved offset.
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    elif limit <= 0:
+        raise ValueError('limit must be positive')
+    limit = min(limit, MAX_PAGE_SIZE)
+    start = 0
+    if cursor:
+        decoded = decode_cursor(cursor)
+        if decoded is None:
+            raise ValueError('Invalid cursor')
+        start, key = decoded
+        if key is not None:
+            for i, item in enumerate(items):
+                if item_key(item) == key:
+                    start = i + 1
+                    break
+
+    page = items[start:start + limit]
+    end = start + len(page)
+    next_cursor = None
+    if end < len(items):
+        next_cursor = encode_cursor(end, item_key(page[-1]) if page else None)
+
+    return {
+        'items': page,
+        'total': len(items),
+        'next_cursor': next_cursor
+    }
@@ -1,18 +1,26 @@
-from quart import Quart, render_template, jsonify, request
+from quart import Quart, render_template, jsonify, request, make_response, Response
 import asyncio
-import aiohttp
+import hashlib
+import json
 import os
 import sys
 from dotenv import load_dotenv
 
-from fetch_plex import fetch_plex_data
-from fetch_qbittorrent import fetch_qbittorrent_data, delete_torrent
-from fetch_sonarr import fetch_sonarr_data
-from fetch_radarr import fetch_radarr_data
-from fetch_overseerr import fetch_overseerr_data
-
+# Before the local imports: several of them read settings from the
+# environment when imported
 load_dotenv()
 
+from fetch_qbittorrent import torrent_action_all, TORRENT_ACTIONS
+from services import create_collector, push_listeners, register_collector_metrics
+from collector_service import RemoteCollector, collector_socket
+from http_pool import create_session, create_sessions, close_sessions
+from history import HistoryRecorder
+from metrics import render as render_metrics
+from api_views import paginate, parse_sections, select_sections
+from compression import MIN_COMPRESS_SIZE, choose_encoding, compress, etag_matches
+from static_files import StaticFiles
+from image_cache import create_image_cache, image_key, load_image, snap_width, sniff_content_type, upstream_image_request
+
 if getattr(sys, 'frozen', False):
     template_folder = os.path.join(sys._MEIPASS, 'templates')
     static_folder = os.path.join(sys._MEIPASS, 'static')
@@ -20,19 +28,63 @@ if getattr(sys, 'frozen', False):
 else:
     app = Quart(__name__, static_folder='static', template_folder='templates')
 
-# Shared aiohttp session
-app.client_session = None
+# One pooled aiohttp session per upstream
+app.sessions = {}
+app.collector = None
+# Path of the collector process's socket in multi-worker mode (serve.py)
+app.collector_socket = None
+app.push_listeners = []
+app.history = None
+app.image_cache = None
+app.static_files = StaticFiles(app.static_folder)
+
+# Serialized /api/data body for the current collector version, plus its
+# compressed variants, so each change is encoded once rather than per client
+app.snapshot_cache = None
+
+register_collector_metrics(lambda: app.collector, lambda: app.push_listeners)
+
+# Idle streams get a comment line this often so proxies don't drop them
+STREAM_KEEPALIVE = 15
 
 @app.before_serving
 async def startup():
-    app.client_session = aiohttp.ClientSession(
-        cookie_jar=aiohttp.CookieJar(unsafe=True)
-    )
+    app.collector_socket = collector_socket()
+    if app.collector_socket:
+        # Worker mode: a separate collector process (collector_service.py)
+        # polls the upstreams; this process only serves HTTP and needs
+        # sessions just for proxied artwork
+        app.sessions = {service: create_session(service) for service in ('plex', 'images')}
+        app.collector = RemoteCollector(app.collector_socket)
+    else:
+        app.sessions = create_sessions()
+        app.collector = create_collector(app.sessions)
+        app.push_listeners = push_listeners(app.collector, app.sessions)
+        for listener in app.push_listeners:
+            listener.start()
+        app.history = HistoryRecorder(app.collector)
+        app.history.start()
+    app.collector.start()
+    app.image_cache = create_image_cache()
 
 @app.after_serving
 async def shutdown():
-    if app.client_session:
-        await app.client_session.close()
+    for listener in app.push_listeners:
+        await listener.stop()
+    if app.history:
+        await app.history.stop()
+    if app.collector:
+        await app.collector.stop()
+    await close_sessions(app.sessions)
+
+def service_urls():
+    return {
+        'plex': os.getenv('PLEX_URL', 'http://localhost:32400'),
+        'qbittorrent': os.getenv('QBITTORRENT_URL', 'http://localhost:8080'),
+        'sonarr': os.getenv('SONARR_URL', 'http://localhost:8989'),
+        'radarr': os.getenv('RADARR_URL', 'http://localhost:7878'),
+        'overseerr': os.getenv('OVERSEERR_URL', 'http://localhost:5055')
+    }
 
 @app.route('/')
 async def index():
@@ -46,44 +98,165 @@ async def index():
 
 @app.route('/api/data')
 async def get_data():
-    if not app.client_session:
-        app.client_session = aiohttp.ClientSession()
-        
-    plex_task = fetch_plex_data(app.client_session)
-    qbit_task = fetch_qbittorrent_data(app.client_session)
-    sonarr_task = fetch_sonarr_data(app.client_session)
-    radarr_task = fetch_radarr_data(app.client_session)
-    overseerr_task = fetch_overseerr_data(app.client_session)
-    
-    # Run all fetches concurrently
-    results = await asyncio.gather(plex_task, qbit_task, sonarr_task, radarr_task, overseerr_task, return_exceptions=True)
-    
-    # Unpack results, handling exceptions safely if any slipped through return_exceptions=True
-    # (Though return_exceptions=True means results contains exceptions as objects)
-    data = []
-    for log, res in zip(['Plex', 'Qbit', 'Sonarr', 'Radarr', 'Overseerr'], results):
-        if isinstance(res, Exception):
-            print(f"Error fetching {log}: {res}")
-            data.append({'error': str(res)})
-        else:
-            data.append(res)
-            
-    urls = {
-        'plex': os.getenv('PLEX_URL', 'http://localhost:32400'),
-        'qbittorrent': os.getenv('QBITTORRENT_URL', 'http://localhost:8080'),
-        'sonarr': os.getenv('SONARR_URL', 'http://localhost:8989'),
-        'radarr': os.getenv('RADARR_URL', 'http://localhost:7878'),
-        'overseerr': os.getenv('OVERSEERR_URL', 'http://localhost:5055')
+    # Served straight from the collector's in-memory snapshot; upstreams are
+    # polled in the background regardless of how many clients are connected.
+    # ?sections=qbittorrent.transfer_info,plex.active_sessions narrows the
+    # response (and which services count as being viewed).
+    sections = parse_sections(request.args.get('sections'))
+    app.collector.touch([service for service, _ in sections] or None)
+    await app.collector.wait_ready(timeout=5)
+
+    if sections:
+        return conditional_json(json_body(select_sections(dashboard_snapshot(), sections)))
+
+    cached = encoded_snapshot()
+    return conditional_json(cached['identity'], cached['tag'], cached)
+
+@app.route('/api/<service>')
+async def get_service(service):
+    # One service's card data; ?fields=transfer_info,recent narrows it further
+    await app.collector.wait_ready(timeout=5)
+    if service not in app.collector.data:
+        return jsonify({'error': f'Unknown service: {service}'}), 404
+    app.collector.touch([service])
+
+    data = app.collector.snapshot()[service]
+    fields = parse_sections(request.args.get('fields'))
+    if fields:
+        data = {name: data[name] for name, _ in fields if name in data}
+    return conditional_json(json_body(data))
+
+@app.route('/api/<service>/<field>')
+async def get_service_list(service, field):
+    # Cursor-paginated view of one list, e.g. /api/qbittorrent/errored_torrents?limit=50
+    await app.collector.wait_ready(timeout=5)
+    if service not in app.collector.data:
+        return jsonify({'error': f'Unknown service: {service}'}), 404
+    app.collector.touch([service])
+
+    items = app.collector.snapshot()[service].get(field)
+    if not isinstance(items, list):
+        return jsonify({'error': f'{service}.{field} is not a list'}), 404
+
+    try:
+        page = paginate(items, request.args.get('cursor'), request.args.get('limit', type=int))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return conditional_json(json_body(page))
+
+@app.route('/api/history')
+async def get_history():
+    # Recorded speeds, active downloads, queue size and Plex sessions for
+    # sparklines: ?tier=1s|1m|1h&points=60&metrics=dl_speed,up_speed
+    tier = request.args.get('tier', '1m')
+    points = request.args.get('points', type=int)
+    metrics = [name for name in request.args.get('metrics', '').split(',') if name] or None
+    if app.collector_socket:
+        result = await app.collector.history(tier, points, metrics)
+    else:
+        result = app.history.query(tier, points, metrics)
+    if 'error' in result:
+        return jsonify(result), 400
+    return conditional_json(json_body(result))
+
+def json_body(payload):
+    return json.dumps(payload, separators=(',', ':')).encode()
+
+def conditional_json(body, tag=None, variants=None):
+    # JSON response with an ETag (honouring If-None-Match) and compression.
+    # Each encoding gets its own ETag, as the static files do, so a cache
+    # never answers one encoding's revalidation with another's bytes.
+    # `variants` caches compressed bodies when the same body is served again.
+    if tag is None:
+        tag = hashlib.blake2b(body, digest_size=12).hexdigest()
+    encoding = choose_encoding(request.headers.get('Accept-Encoding')) if len(body) >= MIN_COMPRESS_SIZE else None
+    etag = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+        'Server-Timing': server_timing()
     }
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response('', status=304, headers=headers)
+
+    if encoding:
+        if variants is None:
+            body = compress(body, encoding)
+        else:
+            if encoding not in variants:
+                variants[encoding] = compress(body, encoding)
+            body = variants[encoding]
+        headers['Content-Encoding'] = encoding
+
+    return Response(body, content_type='application/json', headers=headers)
+
+def dashboard_snapshot():
+    data = app.collector.snapshot()
+    data['urls'] = service_urls()
+    return data
+
+def server_timing():
+    # Per-job duration of the most recent background refresh, so slow
+    # upstreams show up in the browser's devtools next to the request
+    entries = []
+    for name, job in app.collector.jobs.items():
+        if job.last_duration is not None:
+            entries.append(f'{name};dur={job.last_duration * 1000:.1f};desc="{name} ({job.breaker.state})"')
+    return ', '.join(entries)
+
+def encoded_snapshot():
+    version = app.collector.version
+    cached = app.snapshot_cache
+    if cached is None or cached['version'] != version:
+        body = json_body(dashboard_snapshot())
+        # Content hash rather than the version counter, so ETags held by
+        # browsers stay valid across restarts when nothing changed
+        tag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        cached = {'version': version, 'tag': tag, 'identity': body}
+        app.snapshot_cache = cached
+    return cached
 
-    return jsonify({
-        'plex': data[0],
-        'qbittorrent': data[1],
-        'sonarr': data[2],
-        'radarr': data[3],
-        'overseerr': data[4],
-        'urls': urls
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode()
+
+@app.route('/api/stream')
+async def stream():
+    # Server-Sent Events: one full snapshot on connect, then merge patches
+    # containing only what changed in each background refresh
+    await app.collector.wait_ready(timeout=5)
+    queue = app.collector.subscribe()
+
+    async def events():
+        try:
+            yield sse_event('snapshot', dashboard_snapshot())
+            while True:
+                try:
+                    patch = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if patch is None:
+                    yield sse_event('snapshot', dashboard_snapshot())
+                else:
+                    yield sse_event('patch', patch)
+        finally:
+            app.collector.unsubscribe(queue)
+
+    response = await make_response(events(), {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
+    response.timeout = None
+    return response
+
+@app.route('/metrics')
+async def metrics():
+    # In worker mode the interesting metrics (upstreams, refreshes) are the
+    # collector process's
+    text = await app.collector.metrics() if app.collector_socket else render_metrics()
+    return Response(text, content_type='text/plain; version=0.0.4')
 
 @app.route('/api/delete_torrent', methods=['POST'])
 async def delete_torrent_route():
@@ -94,27 +267,124 @@ async def delete_torrent_route():
     if not t_hash:
         return jsonify({'error': 'No hash provided'}), 400
     
-    if not app.client_session:
-        app.client_session = aiohttp.ClientSession()
-        
-    result = await delete_torrent(app.client_session, t_hash, delete_files)
-    return jsonify(result)
+    return jsonify(await qbittorrent_action('delete', [t_hash], delete_files))
+
+async def qbittorrent_action(action, torrents, delete_files=False):
+    # torrents: hashes or {hash, instance} pairs, see group_by_instance
+    if app.collector_socket:
+        # The qBittorrent clients (and their logins) live in the collector
+        return await app.collector.torrent_action(action, torrents, delete_files)
+    result = await torrent_action_all(app.sessions, action, torrents, delete_files)
+    app.collector.trigger(*app.collector.jobs_for('qbittorrent'))
+    return result
+
+def errored_torrents(torrent_filter):
+    # {hash, instance} of the errored torrents currently on the dashboard
+    # that match the filter, e.g. {"message": "Tracker is down"}
+    errored = app.collector.snapshot().get('qbittorrent', {}).get('errored_torrents', [])
+    message = torrent_filter.get('message')
+    state = torrent_filter.get('state')
+    return [{'hash': t['hash'], 'instance': t.get('instance')} for t in errored
+            if (message is None or t.get('message') == message) and (state is None or t.get('state') == state)]
+
+@app.route('/api/torrents/action', methods=['POST'])
+async def torrent_action_route():
+    # Body: {"action": "delete|pause|resume|recheck|reannounce",
+    #        "torrents": [{"instance": ..., "hash": ...}] and/or "hashes": [...]
+    #        and/or "filter": {"errored": true, "message": ..., "state": ...},
+    #        "delete_files": false}
+    # A torrent's instance is the label it is shown under; bare hashes go to
+    # whichever instance has them.
+    data = await request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body must be a JSON object'}), 400
+    action = data.get('action')
+    if action not in TORRENT_ACTIONS:
+        return jsonify({'error': f'Unknown action: {action}'}), 400
+
+    torrents = data.get('torrents') or []
+    if not isinstance(torrents, list) or not all(
+            isinstance(t, dict) and isinstance(t.get('hash'), str) and isinstance(t.get('instance'), (str, type(None)))
+            for t in torrents):
+        return jsonify({'error': 'torrents must be a list of {"instance": ..., "hash": ...}'}), 400
+    hashes = data.get('hashes') or []
+    if not isinstance(hashes, list) or not all(isinstance(t_hash, str) for t_hash in hashes):
+        return jsonify({'error': 'hashes must be a list of strings'}), 400
+    torrents = torrents + hashes
+
+    torrent_filter = data.get('filter')
+    if torrent_filter:
+        if not isinstance(torrent_filter, dict):
+            return jsonify({'error': 'filter must be an object'}), 400
+        if not torrent_filter.get('errored'):
+            return jsonify({'error': 'Only errored torrents can be selected by filter'}), 400
+        torrents += errored_torrents(torrent_filter)
+
+    if not torrents:
+        return jsonify({'error': 'No torrents selected'}), 400
+
+    return jsonify(await qbittorrent_action(action, torrents, data.get('delete_files', False)))
+
+# Proxied images are keyed by upstream URL (which changes when the artwork
+# does), so browsers can keep them forever
+IMAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+@app.route('/img/<source>/<path:path>')
+async def image_proxy(source, path):
+    width = snap_width(request.args.get('w', default=300, type=int))
+    query = {k: v for k, v in request.args.items() if k != 'w'}
+
+    upstream = upstream_image_request(source, path, query, width)
+    if not upstream:
+        return jsonify({'error': 'Unknown image'}), 404
+    url, headers = upstream
+
+    key = image_key(url, width)
+    etag = f'"{key}"'
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response('', status=304, headers={'ETag': etag, 'Cache-Control': IMAGE_CACHE_CONTROL})
+
+    session = app.sessions['plex'] if source == 'plex' else app.sessions['images']
+    data = await app.image_cache.get(key, lambda: load_image(session, url, headers, width))
+    if data is None:
+        return jsonify({'error': 'Image unavailable'}), 502
+
+    return Response(data, content_type=sniff_content_type(data), headers={
+        'ETag': etag,
+        'Cache-Control': IMAGE_CACHE_CONTROL
+    })
+
+async def static_response(path):
+    found = await app.static_files.lookup(path, request.headers.get('Accept-Encoding'),
+                                          request.headers.get('If-None-Match'))
+    if found is None:
+        return None
+    status, body, headers = found
+    return Response(body, status=status, headers=headers)
+
+async def not_found():
+    if os.path.exists(os.path.join(app.template_folder, '404.html')):
+        return await render_template('404.html'), 404
+    return jsonify({'error': 'Not found'}), 404
 
 @app.route('/_next/<path:path>')
 async def next_assets(path):
-    return await app.send_static_file(f'_next/{path}')
+    return await static_response(f'_next/{path}') or await not_found()
 
 @app.route('/favicon.ico')
 async def favicon():
-    return await app.send_static_file('favicon.ico')
+    return await static_response('favicon.ico') or await not_found()
 
 @app.route('/<path:path>')
 async def catch_all(path):
-    # Try serving from root of static (e.g. 404.html, other assets)
-    try:
-        return await app.send_static_file(path)
-    except Exception:
-        return await app.send_static_file('index.html')
+    # Exported files and pages from the manifest; anything else that looks
+    # like a file is a 404, and the rest is a client-side route for the app
+    response = await static_response(path)
+    if response is not None:
+        return response
+    if os.path.splitext(path)[1]:
+        return await not_found()
+    return await index()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 7152))
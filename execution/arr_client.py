@@ -0,0 +1,150 @@
+import aiohttp
+import asyncio
+import os
+
+from instances import instance_env
+
+# Records per queue page; the whole queue is read, a page at a time.
+# ARR_QUEUE_PAGE_SIZE overrides it, read per client
+QUEUE_PAGE_SIZE = 200
+
+# What differs between Sonarr and Radarr: display name, env prefix, the
+# queue flag that includes items not matched to the library, the embedded
+# resource to ask for, and the id queue entries are grouped by
+ARR_KINDS = {
+    'sonarr': ('Sonarr', 'SONARR', 'includeUnknownSeriesItems', 'includeSeries', 'series', 'seriesId'),
+    'radarr': ('Radarr', 'RADARR', 'includeUnknownMovieItems', 'includeMovie', 'movie', 'movieId')
+}
+
+# When a series/movie has several queue entries (e.g. one per episode), the
+# one shown is the most interesting status
+STATUS_PRIORITY = ('downloading', 'queued', 'paused', 'delay', 'completed')
+
+
+class ArrError(Exception):
+    pass
+
+
+class ArrClient:
+    # Sonarr and Radarr share the same v3 API for health and queue, so both
+    # cards are built from this one client
+
+    def __init__(self, session, kind, base_url, api_key):
+        self.session = session
+        self.kind = kind
+        self.base_url = base_url
+        self.api_key = api_key
+        self.page_size = int(os.getenv('ARR_QUEUE_PAGE_SIZE', QUEUE_PAGE_SIZE))
+        (self.title, _, self.unknown_param, self.include_param,
+         self.resource, self.group_key) = ARR_KINDS[kind]
+        self.headers = {
+            'X-Api-Key': api_key,
+            'Accept': 'application/json'
+        }
+
+    async def _get(self, path, label, params=None):
+        async with self.session.get(f"{self.base_url}{path}", headers=self.headers, params=params) as resp:
+            if resp.status != 200:
+                raise ArrError(f'{self.title} {label} HTTP {resp.status}')
+            return await resp.json()
+
+    async def fetch_health(self):
+        health_data = await self._get('/api/v3/health', 'Health')
+        return {
+            'errors': [h for h in health_data if h.get('type') == 'error'],
+            'warnings': [h for h in health_data if h.get('type') == 'warning']
+        }
+
+    async def _queue_page(self, page):
+        return await self._get('/api/v3/queue', 'Queue', {
+            'page': page,
+            'pageSize': self.page_size,
+            'sortKey': 'timeleft',
+            'sortDirection': 'ascending',
+            self.unknown_param: 'true',
+            self.include_param: 'true'
+        })
+
+    async def fetch_queue_records(self):
+        # First page tells us the total, the rest are fetched concurrently
+        first = await self._queue_page(1)
+        records = list(first.get('records', []))
+
+        total = first.get('totalRecords', len(records))
+        pages = -(-total // self.page_size)
+        if pages > 1:
+            rest = await asyncio.gather(*[self._queue_page(page) for page in range(2, pages + 1)])
+            for data in rest:
+                records.extend(data.get('records', []))
+        return records
+
+    def build_activity(self, records):
+        # One entry per series/movie; items not matched to the library are
+        # grouped by release title
+        groups = {}
+        for item in records:
+            key = item.get(self.group_key) or item.get('title')
+            groups.setdefault(key, []).append(item)
+
+        activity = []
+        for key, items in groups.items():
+            first = min(items, key=lambda i: STATUS_PRIORITY.index(i.get('status'))
+                        if i.get('status') in STATUS_PRIORITY else len(STATUS_PRIORITY))
+            resource = first.get(self.resource) or {}
+            activity.append({
+                'id': key,
+                'title': resource.get('title') or first.get('title'),
+                'status': first.get('status'),
+                'protocol': first.get('protocol'),
+                'count': len(items)
+            })
+        return activity
+
+    async def fetch_queue(self):
+        return {'activity': self.build_activity(await self.fetch_queue_records())}
+
+
+def combine_arr(results):
+    # Merges several instances' cards, [(label, data)], into one; every
+    # entry is tagged with the instance it came from
+    merged = {'activity': [], 'errors': [], 'warnings': []}
+    for label, data in results:
+        for key, items in merged.items():
+            items.extend({**item, 'instance': label} for item in data.get(key, []))
+    return merged
+
+
+_clients = {}  # (kind, instance number) -> ArrClient
+
+def get_arr_client(kind, session, instance=1):
+    _, prefix, *_ = ARR_KINDS[kind]
+    base_url = instance_env(prefix, 'URL', instance)
+    api_key = instance_env(prefix, 'API_KEY', instance)
+    if not base_url or not api_key:
+        return None
+
+    base_url = base_url.rstrip('/')
+    client = _clients.get((kind, instance))
+    if client is None or client.session is not session or client.base_url != base_url or client.api_key != api_key:
+        client = ArrClient(session, kind, base_url, api_key)
+        _clients[(kind, instance)] = client
+    return client
+
+async def call_arr(kind, session, method, instance=1):
+    # Runs one ArrClient method, turning failures into the {'error': ...}
+    # dicts the dashboard expects
+    client = get_arr_client(kind, session, instance)
+    title = ARR_KINDS[kind][0]
+    if not client:
+        return {'error': f'{title} not configured'}
+
+    try:
+        return await getattr(client, method)()
+    except ArrError as e:
+        return {'error': str(e)}
+    except asyncio.TimeoutError:
+         return {'error': f'{title} Connection Timeout'}
+    except aiohttp.ClientError as e:
+         return {'error': f'{title} Connection Error: {str(e)}'}
+    except Exception as e:
+        return {'error': str(e)}
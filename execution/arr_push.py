@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+
+from arr_client import get_arr_client
+from push_listener import HEARTBEAT, PushListener
+
+# Sonarr and Radarr broadcast resource changes over an ASP.NET Core SignalR
+# hub. Their queue and health messages are "sync" notifications without the
+# changed records, so an event means "refetch this now" rather than a delta.
+
+HUB_PATH = '/signalr/messages'
+
+# SignalR JSON protocol: records end with this separator; message type 1 is
+# an invocation, 6 a ping, 7 a close
+RECORD_SEPARATOR = '\x1e'
+INVOCATION = 1
+CLOSE = 7
+
+# Queue events come in bursts (one per changed item); they are coalesced
+# into one refetch this many seconds after the first (ARR_PUSH_DEBOUNCE,
+# read per listener)
+DEBOUNCE = 1
+
+def push_enabled():
+    return os.getenv('ARR_PUSH', '0').lower() in ('1', 'true', 'yes')
+
+
+class ArrPushListener(PushListener):
+    # Subscribes to one Sonarr/Radarr hub and wakes its queue and health jobs
+
+    ping_interval = 15
+    ping_message = json.dumps({'type': 6}) + RECORD_SEPARATOR
+
+    def __init__(self, collector, session, instance):
+        super().__init__(collector, session)
+        self.kind = instance.service
+        self.number = instance.number
+        self.name = instance.label
+        self.resource_jobs = {
+            'queue': f'{instance.id}_queue',
+            'health': f'{instance.id}_health'
+        }
+        self.jobs = tuple(self.resource_jobs.values())
+        self.debounce = float(os.getenv('ARR_PUSH_DEBOUNCE', DEBOUNCE))
+        self._scheduled = set()
+
+    async def connect(self):
+        client = get_arr_client(self.kind, self.session, self.number)
+        if not client:
+            return None
+
+        hub = f"{client.base_url}{HUB_PATH}"
+        async with self.session.post(f"{hub}/negotiate", params={'negotiateVersion': 1},
+                                     headers=client.headers) as resp:
+            if resp.status != 200:
+                raise ConnectionError(f'{self.name} negotiate HTTP {resp.status}')
+            negotiated = await resp.json()
+
+        token = negotiated.get('connectionToken') or negotiated.get('connectionId')
+        return await self.session.ws_connect(
+            hub,
+            params={'id': token, 'access_token': client.api_key},
+            headers=client.headers,
+            heartbeat=HEARTBEAT
+        )
+
+    async def on_connected(self, ws):
+        await ws.send_str(json.dumps({'protocol': 'json', 'version': 1}) + RECORD_SEPARATOR)
+
+    def handle(self, data):
+        for record in data.split(RECORD_SEPARATOR):
+            if not record:
+                continue
+            try:
+                message = json.loads(record)
+            except ValueError:
+                continue
+
+            if message.get('type') == CLOSE:
+                print(f"{self.name} push closed by server: {message.get('error')}")
+            elif message.get('type') == INVOCATION and message.get('target') == 'receiveMessage':
+                for argument in message.get('arguments', []):
+                    # 'queue', 'queue/status', 'queue/details', 'health', ...
+                    resource = (argument.get('name') or '').split('/')[0]
+                    if resource in self.resource_jobs:
+                        self._schedule(self.resource_jobs[resource])
+
+    def _schedule(self, job):
+        if job in self._scheduled:
+            return
+        self._scheduled.add(job)
+        asyncio.get_running_loop().call_later(self.debounce, self._fire, job)
+
+    def _fire(self, job):
+        self._scheduled.discard(job)
+        self.collector.trigger(job)
@@ -0,0 +1,49 @@
+import time
+
+# Consecutive failures before a circuit opens, and how long it stays open
+# before the next probe (doubling on each failed probe, up to the max).
+# Jobs override them with CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_BACKOFF and
+# CIRCUIT_MAX_BACKOFF (see collector.breaker_settings).
+FAILURE_THRESHOLD = 3
+BASE_BACKOFF = 10
+MAX_BACKOFF = 300
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    # Stops calling an upstream that keeps failing, so a dead service costs
+    # one timeout per backoff period instead of one per poll
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, base_backoff=BASE_BACKOFF, max_backoff=MAX_BACKOFF):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = base_backoff
+        self.next_probe = 0
+
+    def allow(self):
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() >= self.next_probe:
+            # Let a single call through to see whether the service is back
+            self.state = HALF_OPEN
+            return True
+        return False
+
+    def record_success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.backoff = self.base_backoff
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state == HALF_OPEN:
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            self.state = OPEN
+            self.next_probe = time.monotonic() + self.backoff
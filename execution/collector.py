@@ -0,0 +1,329 @@
+import asyncio
+import os
+import time
+
+from circuit import BASE_BACKOFF, FAILURE_THRESHOLD, MAX_BACKOFF, CircuitBreaker
+from metrics import refresh_latency
+
+# Seconds between refreshes when a job has no interval of its own
+DEFAULT_INTERVAL = 5
+
+# Pending patches a streaming client may fall behind by before its backlog is
+# dropped and it is sent a fresh full snapshot instead
+SUBSCRIBER_QUEUE_SIZE = 32
+
+# With nobody looking at the dashboard for IDLE_AFTER seconds, intervals are
+# stretched by IDLE_BACKOFF (never beyond IDLE_MAX_INTERVAL, and never below a
+# job's own interval). Overridden by DASHBOARD_IDLE_AFTER etc., read when the
+# Collector is created
+IDLE_AFTER = 120
+IDLE_BACKOFF = 5
+IDLE_MAX_INTERVAL = 300
+
+
+def merge_diff(old, new):
+    # JSON merge patch (RFC 7386) turning `old` into `new`. Dicts are diffed
+    # key by key, anything else (lists included) is replaced wholesale.
+    patch = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                patch[key] = merge_diff(old[key], value)
+            else:
+                patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+def apply_patch(target, patch):
+    # Inverse of merge_diff. Returns a new object rather than changing
+    # `target`, so snapshots already handed out stay as they were.
+    if not isinstance(patch, dict) or not isinstance(target, dict):
+        return patch
+    result = dict(target)
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_patch(result.get(key), value)
+    return result
+
+def publish_patch(subscribers, patch):
+    # Queues a patch for every streaming client. One that has fallen too far
+    # behind loses its backlog and gets None: "resend the full snapshot".
+    for queue in subscribers:
+        try:
+            queue.put_nowait(patch)
+        except asyncio.QueueFull:
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+def merge_instances(results, combine):
+    # Builds one card from several instances of a service, [(label, data)].
+    # Instances that are down are listed in instance_errors while the others
+    # keep showing; the card only errors when every instance does.
+    errors = [{'instance': label, 'error': data['error']} for label, data in results if 'error' in data]
+    usable = [(label, data) for label, data in results if set(data) - {'error', 'stale_since'}]
+
+    merged = combine(usable) if usable else {}
+    if errors:
+        merged['instance_errors'] = errors
+        if len(errors) == len(results):
+            merged['error'] = '; '.join(f"{e['instance']}: {e['error']}" for e in errors)
+    stale = [data['stale_since'] for _, data in usable if 'stale_since' in data]
+    if stale:
+        merged['stale_since'] = min(stale)
+    return merged
+
+def env_interval(name, default, parse=float):
+    try:
+        return parse(os.getenv(name, default))
+    except ValueError:
+        print(f"Ignoring invalid {name}={os.getenv(name)!r}")
+        return parse(default)
+
+def breaker_settings():
+    # Read when each job is created, so values from .env apply
+    return (env_interval('CIRCUIT_FAILURE_THRESHOLD', FAILURE_THRESHOLD, int),
+            env_interval('CIRCUIT_BACKOFF', BASE_BACKOFF),
+            env_interval('CIRCUIT_MAX_BACKOFF', MAX_BACKOFF))
+
+
+class Job:
+    # One thing the collector refreshes on its own schedule. Several jobs can
+    # feed the same service, their results are merged into one card.
+
+    def __init__(self, name, service, fetch, interval=DEFAULT_INTERVAL, busy_interval=None, push_interval=None,
+                 session=None, instance=None):
+        self.name = name
+        self.service = service
+        # Services configured more than once get a job per instance, each with
+        # its own session; `instance` is the label its results are merged under
+        self.session = session or service
+        self.instance = instance
+        self.fetch = fetch  # coroutine taking a session, returning a dict
+        self.interval = interval
+        self.busy_interval = busy_interval  # used while downloads/playback are active
+        # While a push source (e.g. a websocket) is telling us when this job's
+        # data changes, polling drops to this slow resync interval
+        self.push_interval = push_interval
+        self.pushed = False
+        self.wake = asyncio.Event()
+        self.breaker = CircuitBreaker(*breaker_settings())
+        self.last_good = None
+        self.failing_since = None
+        self.last_duration = None  # seconds the last upstream refresh took
+
+
+class Collector:
+    # Polls every upstream service in the background and keeps the latest
+    # result for each one in memory. HTTP handlers only ever read from here,
+    # so the number of connected dashboards has no effect on upstream load.
+
+    def __init__(self, sessions, jobs, combiners=None):
+        self.sessions = sessions  # instance id -> pooled aiohttp session
+        # service -> function merging [(instance label, data)] into one card
+        self.combiners = combiners or {}
+        self.jobs = {job.name: job for job in jobs}
+        self.parts = {job.name: {} for job in jobs}
+        self.data = {job.service: {} for job in jobs}
+        self.updated_at = {}
+        self.version = 0
+        self.last_viewed = {service: time.monotonic() for service in self.data}
+        self._pending = set(self.jobs)
+        self._ready = asyncio.Event()
+        self._tasks = []
+        self._subscribers = set()
+        self._viewers = set()  # subscribers that are people looking at the dashboard
+        self.remote_clients = 0  # stream clients of worker processes, see collector_service
+        self.idle_after = env_interval('DASHBOARD_IDLE_AFTER', IDLE_AFTER)
+        self.idle_backoff = env_interval('DASHBOARD_IDLE_BACKOFF', IDLE_BACKOFF)
+        self.idle_max_interval = env_interval('DASHBOARD_IDLE_MAX_INTERVAL', IDLE_MAX_INTERVAL)
+
+    def start(self):
+        for job in self.jobs.values():
+            self._tasks.append(asyncio.create_task(self._poll(job)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def is_idle(self, service):
+        # Live streams watch every service; otherwise a service is idle once
+        # no request has asked for it in a while
+        return not self.client_count and time.monotonic() - self.last_viewed[service] > self.idle_after
+
+    def is_busy(self):
+        qbit = self.data.get('qbittorrent') or {}
+        plex = self.data.get('plex') or {}
+        return bool(qbit.get('active_downloads') or plex.get('active_sessions'))
+
+    def interval_for(self, job):
+        interval = job.interval
+        if job.pushed and job.push_interval is not None:
+            interval = job.push_interval
+        elif job.busy_interval is not None and self.is_busy():
+            interval = min(interval, job.busy_interval)
+        if self.is_idle(job.service):
+            interval = max(interval, min(interval * self.idle_backoff, self.idle_max_interval))
+        return interval
+
+    def touch(self, services=None):
+        # Called whenever a client reads the dashboard, with the services it
+        # asked for (all by default). Services nobody asks for back off.
+        # Coming back from idle wakes a service's jobs so the returning
+        # viewer doesn't see stale data for a whole backed-off interval.
+        now = time.monotonic()
+        for service in services or list(self.last_viewed):
+            if service not in self.last_viewed:
+                continue
+            if self.is_idle(service):
+                self.trigger(*self.jobs_for(service))
+            self.last_viewed[service] = now
+
+    def jobs_for(self, service):
+        return [name for name, job in self.jobs.items() if job.service == service]
+
+    def trigger(self, *names):
+        # Refresh the named jobs (all of them by default) right away
+        for name in names or self.jobs:
+            self.jobs[name].wake.set()
+
+    def set_pushed(self, names, connected):
+        # Called by push sources as they connect and disconnect. Either way the
+        # jobs refresh now: on connect to catch up with whatever changed while
+        # disconnected, on disconnect so polling picks up straight away.
+        for name in names:
+            self.jobs[name].pushed = connected
+        self.trigger(*names)
+
+    async def _poll(self, job):
+        while True:
+            await self.refresh(job.name)
+            try:
+                await asyncio.wait_for(job.wake.wait(), self.interval_for(job))
+            except asyncio.TimeoutError:
+                pass
+            job.wake.clear()
+
+    async def refresh(self, name):
+        job = self.jobs[name]
+        if not job.breaker.allow():
+            # Circuit open: keep serving what we have until the next probe
+            self._mark_ready(name)
+            return
+
+        started = time.perf_counter()
+        try:
+            result = await job.fetch(self.sessions[job.session])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Fetchers normally return {'error': ...} themselves, this only
+            # catches whatever slips through so the poll loop keeps running
+            print(f"Error fetching {name}: {e}")
+            result = {'error': str(e)}
+        job.last_duration = time.perf_counter() - started
+        refresh_latency.observe(job.last_duration, name)
+
+        if 'error' in result:
+            job.breaker.record_failure()
+            if job.failing_since is None:
+                job.failing_since = time.time()
+            if job.last_good is not None:
+                # Stale-while-error: keep the card populated with the last
+                # good data and say since when it has been stale
+                result = {**job.last_good, 'error': result['error'], 'stale_since': job.failing_since}
+        else:
+            job.breaker.record_success()
+            job.last_good = result
+            job.failing_since = None
+
+        self.parts[name] = result
+        self._merge(job.service)
+        self._mark_ready(name)
+
+    def _mark_ready(self, name):
+        self._pending.discard(name)
+        if not self._pending:
+            self._ready.set()
+
+    def _merge(self, service):
+        instances = {}
+        for name, job in self.jobs.items():
+            if job.service == service:
+                instances.setdefault(job.instance, {}).update(self.parts[name])
+
+        if len(instances) > 1 and service in self.combiners:
+            merged = merge_instances(list(instances.items()), self.combiners[service])
+        else:
+            merged = {}
+            for part in instances.values():
+                merged.update(part)
+
+        previous = self.data.get(service, {})
+        self.data[service] = merged
+        self.updated_at[service] = time.time()
+        self.version += 1
+
+        changes = merge_diff(previous, merged)
+        if changes:
+            self._publish({service: changes})
+
+    async def wait_ready(self, timeout):
+        # Lets the very first request after startup wait for real data
+        # instead of rendering a dashboard full of empty cards
+        if self._ready.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def snapshot(self):
+        # Results are replaced wholesale on refresh, never mutated, so a
+        # shallow copy is a consistent view
+        return dict(self.data)
+
+    def subscribe(self, viewer=True):
+        # Each streaming client gets a queue of merge patches. A None entry
+        # means the client fell behind and should be resent the full snapshot.
+        # Non-viewer subscribers (worker processes mirroring the data) don't
+        # keep the collector out of idle.
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if viewer:
+            self.touch()
+            self._viewers.add(queue)
+        return queue
+
+    @property
+    def client_count(self):
+        return len(self._viewers) + self.remote_clients
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+        if queue in self._viewers:
+            self._viewers.discard(queue)
+            self._viewers_changed()
+
+    def set_remote_clients(self, count):
+        if count != self.remote_clients:
+            self.remote_clients = count
+            self._viewers_changed()
+
+    def _viewers_changed(self):
+        # The idle countdown starts when the last stream closes
+        if not self.client_count:
+            now = time.monotonic()
+            for service in self.last_viewed:
+                self.last_viewed[service] = now
+
+    def _publish(self, patch):
+        publish_patch(self._subscribers, patch)
@@ -0,0 +1,316 @@
+import asyncio
+import json
+import os
+import signal
+import time
+import types
+
+from dotenv import load_dotenv
+
+# Run as the collector process, this is the entry point: load .env before
+# the local imports, several of which read settings when imported
+load_dotenv()
+
+from collector import SUBSCRIBER_QUEUE_SIZE, apply_patch, publish_patch
+from fetch_qbittorrent import torrent_action_all
+from history import HistoryRecorder
+from http_pool import close_sessions, create_sessions
+from metrics import render as render_metrics
+from services import create_collector, push_listeners, register_collector_metrics
+from storage import cache_dir
+
+# Multi-worker mode. One collector process (`python collector_service.py`)
+# polls the upstreams and publishes its data over a Unix socket; every HTTP
+# worker (app.py with DASHBOARD_COLLECTOR_SOCKET set, see serve.py) keeps a
+# mirror of it. Messages are newline-delimited JSON in both directions:
+#
+#   collector -> worker: snapshot {data, jobs}, patch {patch, jobs}, result {id, result}
+#   worker -> collector: touch {services}, viewers {count}, trigger {jobs},
+#                        action {id, action, torrents, delete_files}, metrics {id},
+#                        history {id, tier, points, metrics}
+
+def collector_socket():
+    # Set for HTTP workers by serve.py; unset in single-process mode
+    return os.getenv('DASHBOARD_COLLECTOR_SOCKET')
+
+# A full snapshot (or a bulk action listing every torrent) is one line; both
+# ends accept lines up to this size
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+RECONNECT_DELAY = 1
+
+# Workers forward "someone is looking at this service" at most this often
+TOUCH_INTERVAL = 1
+
+REQUEST_TIMEOUT = 30
+
+def default_socket_path():
+    return os.path.join(cache_dir(), 'collector.sock')
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+def job_states(collector):
+    return {name: {'service': job.service, 'state': job.breaker.state, 'duration': job.last_duration}
+            for name, job in collector.jobs.items()}
+
+
+class CollectorServer:
+    # Collector-process side: mirrors the collector to every connected worker
+    # and carries out what they ask for
+
+    def __init__(self, collector, path, history=None):
+        self.collector = collector
+        self.path = path
+        self.history = history
+        self.viewers = {}  # worker writer -> its stream client count
+        self._server = None
+
+    async def start(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path, limit=MAX_MESSAGE_SIZE)
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        lock = asyncio.Lock()
+        queue = self.collector.subscribe(viewer=False)
+        self.viewers[writer] = 0
+        sender = asyncio.create_task(self._send_updates(writer, lock, queue))
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                task = asyncio.create_task(self._dispatch(writer, lock, message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, ValueError) as e:
+            print(f"Collector: dropping worker connection: {e}")
+        finally:
+            sender.cancel()
+            for task in tasks:
+                task.cancel()
+            self.collector.unsubscribe(queue)
+            self.viewers.pop(writer, None)
+            self.collector.set_remote_clients(sum(self.viewers.values()))
+            writer.close()
+
+    async def _write(self, writer, lock, message):
+        async with lock:
+            writer.write(encode(message))
+            await writer.drain()
+
+    def _snapshot(self):
+        return {'type': 'snapshot', 'data': self.collector.snapshot(), 'jobs': job_states(self.collector)}
+
+    async def _send_updates(self, writer, lock, queue):
+        await self.collector.wait_ready(timeout=5)
+        await self._write(writer, lock, self._snapshot())
+        while True:
+            patch = await queue.get()
+            if patch is None:
+                message = self._snapshot()
+            else:
+                message = {'type': 'patch', 'patch': patch, 'jobs': job_states(self.collector)}
+            await self._write(writer, lock, message)
+
+    async def _dispatch(self, writer, lock, message):
+        kind = message.get('type')
+        if kind == 'touch':
+            self.collector.touch(message.get('services'))
+        elif kind == 'viewers':
+            self.viewers[writer] = int(message.get('count', 0))
+            self.collector.set_remote_clients(sum(self.viewers.values()))
+        elif kind == 'trigger':
+            self.collector.trigger(*[name for name in message.get('jobs') or [] if name in self.collector.jobs])
+        elif kind == 'action':
+            result = await torrent_action_all(self.collector.sessions, message.get('action'),
+                                              message.get('torrents') or [], message.get('delete_files', False))
+            self.collector.trigger(*self.collector.jobs_for('qbittorrent'))
+            await self._write(writer, lock, {'type': 'result', 'id': message.get('id'), 'result': result})
+        elif kind == 'metrics':
+            await self._write(writer, lock, {'type': 'result', 'id': message.get('id'), 'result': render_metrics()})
+        elif kind == 'history':
+            result = self.history.query(message.get('tier'), message.get('points'), message.get('metrics'))
+            await self._write(writer, lock, {'type': 'result', 'id': message.get('id'), 'result': result})
+
+
+class RemoteCollector:
+    # Worker-process side: stands in for Collector in app.py. Keeps a copy of
+    # the collector's data from its snapshot and patches, relays them to this
+    # worker's stream clients, and forwards touches, triggers and actions.
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        self.jobs = {}  # name -> job-like namespace (service, breaker.state, last_duration)
+        self.version = 0
+        self._ready = asyncio.Event()
+        self._subscribers = set()
+        self._writer = None
+        self._task = None
+        self._requests = {}
+        self._next_id = 0
+        self._touched = {}
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=MAX_MESSAGE_SIZE)
+                self._writer = writer
+                self._send({'type': 'viewers', 'count': self.client_count})
+                while line := await reader.readline():
+                    self._receive(json.loads(line))
+            except (OSError, ValueError) as e:
+                print(f"Collector connection lost ({self.path}): {e}")
+            finally:
+                if self._writer:
+                    self._writer.close()
+                self._writer = None
+                for future in self._requests.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError('Collector connection lost'))
+                self._requests.clear()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def _receive(self, message):
+        kind = message.get('type')
+        if kind == 'snapshot':
+            self.data = message['data']
+            self._update_jobs(message['jobs'])
+            self.version += 1
+            self._ready.set()
+            publish_patch(self._subscribers, None)
+        elif kind == 'patch':
+            for service, changes in message['patch'].items():
+                self.data[service] = apply_patch(self.data.get(service, {}), changes)
+            self._update_jobs(message['jobs'])
+            self.version += 1
+            publish_patch(self._subscribers, message['patch'])
+        elif kind == 'result':
+            future = self._requests.pop(message.get('id'), None)
+            if future and not future.done():
+                future.set_result(message.get('result'))
+
+    def _update_jobs(self, states):
+        self.jobs = {name: types.SimpleNamespace(service=state['service'], last_duration=state['duration'],
+                                                 breaker=types.SimpleNamespace(state=state['state']))
+                     for name, state in states.items()}
+
+    def _send(self, message):
+        if self._writer:
+            self._writer.write(encode(message))
+
+    async def _request(self, message):
+        if not self._writer:
+            raise ConnectionError('Collector not connected')
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._requests[self._next_id] = future
+        self._send({**message, 'id': self._next_id})
+        return await asyncio.wait_for(future, REQUEST_TIMEOUT)
+
+    def touch(self, services=None):
+        key = tuple(services) if services else None
+        now = time.monotonic()
+        if now - self._touched.get(key, 0) >= TOUCH_INTERVAL:
+            self._touched[key] = now
+            self._send({'type': 'touch', 'services': services})
+
+    def jobs_for(self, service):
+        return [name for name, job in self.jobs.items() if job.service == service]
+
+    def trigger(self, *names):
+        self._send({'type': 'trigger', 'jobs': list(names) or list(self.jobs)})
+
+    async def torrent_action(self, action, torrents, delete_files=False):
+        try:
+            return await self._request({'type': 'action', 'action': action, 'torrents': torrents,
+                                        'delete_files': delete_files})
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            return {'error': f'Collector unavailable: {e}'}
+
+    async def metrics(self):
+        try:
+            return await self._request({'type': 'metrics'})
+        except (ConnectionError, asyncio.TimeoutError):
+            return ''
+
+    async def history(self, tier, points=None, metrics=None):
+        try:
+            return await self._request({'type': 'history', 'tier': tier, 'points': points, 'metrics': metrics})
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            return {'error': f'Collector unavailable: {e}'}
+
+    async def wait_ready(self, timeout):
+        if self._ready.is_set():
+            return
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def snapshot(self):
+        return dict(self.data)
+
+    def subscribe(self, viewer=True):
+        self.touch()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        self._send({'type': 'viewers', 'count': self.client_count})
+        return queue
+
+    @property
+    def client_count(self):
+        return len(self._subscribers)
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+        self._send({'type': 'viewers', 'count': self.client_count})
+
+
+async def serve(path):
+    sessions = create_sessions()
+    collector = create_collector(sessions)
+    listeners = push_listeners(collector, sessions)
+    register_collector_metrics(lambda: collector, lambda: listeners)
+
+    history = HistoryRecorder(collector)
+
+    collector.start()
+    history.start()
+    for listener in listeners:
+        listener.start()
+    server = CollectorServer(collector, path, history)
+    await server.start()
+    print(f"Collector listening on {path}")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+    await stopping.wait()
+
+    await server.stop()
+    for listener in listeners:
+        await listener.stop()
+    await history.stop()
+    await collector.stop()
+    await close_sessions(sessions)
+
+if __name__ == '__main__':
+    asyncio.run(serve(collector_socket() or default_socket_path()))
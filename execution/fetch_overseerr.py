@@ -2,8 +2,111 @@ import aiohttp
 import asyncio
 import json
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime
 
+from image_cache import image_url
+from json_stream import read_fields, read_items
+from metrics import cache_requests
+from storage import cache_dir, load_json, write_json_atomic
+
+# Only these fields of a (large, TMDB-sized) media details response are kept
+DETAIL_FIELDS = ('title', 'name', 'posterPath')
+
+# Media details (title, poster) looked up for requests that lack them:
+# entries kept, lookups at once, and seconds before a failed lookup is tried
+# again. OVERSEERR_DETAIL_CACHE_SIZE, OVERSEERR_DETAIL_CONCURRENCY and
+# OVERSEERR_DETAIL_RETRY override them, read when used so .env applies.
+DETAIL_CACHE_SIZE = 1000
+DETAIL_CONCURRENCY = 4
+DETAIL_RETRY = 300
+
+POSTER_WIDTH = 200
+
+
+class MediaDetailCache:
+    # "{movie|tv}:{tmdbId}" -> {'title', 'posterPath'}, least recently used
+    # entries evicted first. Kept on disk so a restart doesn't refetch them.
+    # Failed lookups are remembered (in memory only) for a while so every
+    # poll doesn't ask again for the same missing media.
+
+    def __init__(self):
+        self.max_entries = DETAIL_CACHE_SIZE
+        self.entries = None
+        self.dirty = False
+        self.failed = {}  # key -> monotonic time it may be looked up again
+
+    def _path(self):
+        return os.path.join(cache_dir(), 'overseerr_media.json')
+
+    def load(self):
+        if self.entries is None:
+            self.max_entries = int(os.getenv('OVERSEERR_DETAIL_CACHE_SIZE', DETAIL_CACHE_SIZE))
+            self.entries = OrderedDict(load_json(self._path(), default={}))
+
+    def get(self, key):
+        self.load()
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def recently_failed(self, key):
+        retry_at = self.failed.get(key)
+        if retry_at is None:
+            return False
+        if time.monotonic() < retry_at:
+            return True
+        del self.failed[key]
+        return False
+
+    def put_failure(self, key):
+        self.failed[key] = time.monotonic() + float(os.getenv('OVERSEERR_DETAIL_RETRY', DETAIL_RETRY))
+
+    def put(self, key, value):
+        self.load()
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        try:
+            write_json_atomic(self._path(), self.entries)
+        except OSError as e:
+            print(f"Overseerr detail cache save failed: {e}")
+
+
+detail_cache = MediaDetailCache()
+
+async def fetch_media_details(session, base_url, headers, request_type, tmdb_id, semaphore):
+    key = f"{request_type}:{tmdb_id}"
+    async with semaphore:
+        try:
+            # Fetch details from Overseerr (which proxies/caches TMDB)
+            # Ensure request_type matches endpoint expectation (movie/tv)
+            detail_url = f"{base_url}/api/v1/{request_type}/{tmdb_id}"
+            async with session.get(detail_url, headers=headers) as resp_d:
+                if resp_d.status != 200:
+                    detail_cache.put_failure(key)
+                    return
+                details = await read_fields(resp_d, DETAIL_FIELDS)
+        except Exception as e:
+            # Fail silently on details fetch to avoid breaking the dashboard
+            print(f"Overseerr detail fetch failed for {tmdb_id}: {e}")
+            detail_cache.put_failure(key)
+            return
+
+    detail_cache.put(key, {
+        'title': details.get('title') or details.get('name'),
+        'posterPath': details.get('posterPath')
+    })
+
 async def fetch_overseerr_data(session):
     base_url = os.getenv('OVERSEERR_URL')
     api_key = os.getenv('OVERSEERR_API_KEY')
@@ -20,15 +123,15 @@ async def fetch_overseerr_data(session):
     
     try:
         # Fetch requests
-        async with session.get(f"{base_url}/api/v1/request?take=50&sort=added&skip=0", headers=headers, timeout=2) as response:
+        async with session.get(f"{base_url}/api/v1/request?take=50&sort=added&skip=0", headers=headers) as response:
              if response.status != 200:
                  return {'error': f'Overseerr HTTP {response.status}'}
-             data = await response.json()
-        
-        results = data.get('results', [])
+             # Filter for status = 1 (PENDING APPROVAL) while parsing
+             results = await read_items(response, 'results', keep=lambda item: item.get('status') == 1)
+
         pending_requests = []
-        
-        # Filter for status = 1 (PENDING APPROVAL)
+        missing = []
+
         for item in results:
             if item.get('status') == 1:
                 media = item.get('media') or {}
@@ -61,43 +164,49 @@ async def fetch_overseerr_data(session):
                 elif 'originalName' in media:
                     title = media['originalName']
                 
-                # If title is still unknown or we want to ensure we have the poster, fetch details
-                if (title == "Unknown Title" or not poster_path) and tmdb_id and request_type:
-                    try:
-                        # Fetch details from Overseerr (which proxies/caches TMDB)
-                        # Ensure request_type matches endpoint expectation (movie/tv)
-                        detail_url = f"{base_url}/api/v1/{request_type}/{tmdb_id}"
-                        async with session.get(detail_url, headers=headers, timeout=3) as resp_d:
-                            if resp_d.status == 200:
-                                details = await resp_d.json()
-                                
-                                # Update title
-                                if 'title' in details:
-                                    title = details['title']
-                                elif 'name' in details:
-                                    title = details['name']
-                                    
-                                # Update poster if missing
-                                if not poster_path and 'posterPath' in details:
-                                    poster_path = details['posterPath']
-                    except Exception as e:
-                        # Fail silently on details fetch to avoid breaking the dashboard
-                        print(f"Overseerr detail fetch failed for {tmdb_id}: {e}")
-
                 # Image URL
-                image_url = ""
+                image = ""
                 if poster_path:
-                   image_url = f"https://image.tmdb.org/t/p/w200{poster_path}"
+                   image = image_url('tmdb', poster_path, POSTER_WIDTH)
                 
-                pending_requests.append({
+                entry = {
                     'id': item.get('id'),
                     'title': title,
                     'user': user.get('email', 'Unknown User').split('@')[0], 
                     'user_avatar': user.get('avatar'), 
                     'date': date_str,
-                    'image': image_url,
+                    'image': image,
                     'status': 'Pending Approval'
-                })
+                }
+                pending_requests.append(entry)
+
+                # Title or poster missing from the list: look them up
+                # below, from the cache if possible
+                if (title == "Unknown Title" or not poster_path) and tmdb_id and request_type:
+                    missing.append((entry, f"{request_type}:{tmdb_id}", request_type, tmdb_id))
+
+        # Fetch whatever isn't cached yet concurrently, then fill in titles
+        # and posters from the cache
+        misses = {key: (request_type, tmdb_id) for _, key, request_type, tmdb_id in missing
+                  if detail_cache.get(key) is None and not detail_cache.recently_failed(key)}
+        cache_requests.inc('overseerr_details', 'hit', amount=len(missing) - len(misses))
+        cache_requests.inc('overseerr_details', 'miss', amount=len(misses))
+        if misses:
+            semaphore = asyncio.Semaphore(int(os.getenv('OVERSEERR_DETAIL_CONCURRENCY', DETAIL_CONCURRENCY)))
+            await asyncio.gather(*[
+                fetch_media_details(session, base_url, headers, request_type, tmdb_id, semaphore)
+                for request_type, tmdb_id in misses.values()
+            ])
+            await asyncio.to_thread(detail_cache.save)
+
+        for entry, key, _, _ in missing:
+            details = detail_cache.get(key)
+            if not details:
+                continue
+            if entry['title'] == "Unknown Title" and details.get('title'):
+                entry['title'] = details['title']
+            if not entry['image'] and details.get('posterPath'):
+                entry['image'] = image_url('tmdb', details['posterPath'], POSTER_WIDTH)
 
         return {
             'requests': pending_requests,
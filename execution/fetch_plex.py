@@ -1,137 +1,252 @@
 import aiohttp
 import asyncio
+import heapq
 import urllib.parse
 import json
 import os
+import time
 import traceback
 
-async def fetch_plex_data(session):
+from image_cache import image_url
+
+# Widths artwork is requested at, matching how large the UI draws it
+POSTER_WIDTH = 300
+HERO_WIDTH = 1280
+AVATAR_WIDTH = 64
+
+def plex_image(path, width):
+    return image_url('plex', path, width) if path else None
+
+def plextv_image(url, width):
+    # User avatars are absolute plex.tv URLs
+    if not url:
+        return None
+    parsed = urllib.parse.urlparse(url)
+    if parsed.netloc != 'plex.tv':
+        return url
+    return image_url('plextv', parsed.path, width, dict(urllib.parse.parse_qsl(parsed.query)))
+
+HEADERS = {
+    'Accept': 'application/json'
+}
+
+# Recently added shelves: items shown per shelf, items kept per library
+# section, and how often every section is re-read in full. Overridden by
+# PLEX_RECENT_LIMIT, PLEX_RECENT_PER_SECTION and PLEX_RECENT_RESYNC
+RECENT_LIMIT = 5
+RECENT_PER_SECTION = 5
+RECENT_RESYNC = 3600
+
+# Library section type holding each item type
+SECTION_TYPES = {1: 'movie', 4: 'show'}
+
+
+class PlexError(Exception):
+    pass
+
+
+def plex_config():
     plex_url = os.getenv('PLEX_URL')
     plex_token = os.getenv('PLEX_TOKEN')
-    
     if not plex_url or not plex_token:
-        return {'error': 'Plex not configured'}
+        return None
+    return plex_url.rstrip('/'), plex_token
+
+def format_recent_item(item, lib_type):
+    title = item.get('title')
+    if lib_type == 4: # Shows
+        grandparent = item.get('grandparentTitle', '')
+        # Plex often puts show title in grandparentTitle for episodes
+        if grandparent:
+            title = f"{grandparent}"
 
-    plex_url = plex_url.rstrip('/')
+        # Use series poster (grandparentThumb) if available, else fallback to episode thumb
+        thumb_path = item.get('grandparentThumb') or item.get('thumb')
 
-    headers = {
-        'Accept': 'application/json'
+        return {
+            'id': item.get('ratingKey'),
+            'title': title,
+            'episode': item.get('title'), # Episode name
+            'thumb': plex_image(thumb_path, POSTER_WIDTH)
+        }
+    return {
+        'id': item.get('ratingKey'),
+        'title': title,
+        'year': item.get('year'),
+        'thumb': plex_image(item.get('thumb'), POSTER_WIDTH)
     }
-    
-    async def get_recent_items(lib_type, limit=5):
-        # type 1 = Movie, type 4 = Episode
-        params = urllib.parse.urlencode({
-            'type': lib_type,
+
+
+class RecentlyAdded:
+    # Recently added items of one type (1 = Movie, 4 = Episode), kept per
+    # library section. A full read of each section happens at startup and
+    # every resync seconds (which also picks up new sections and
+    # deletions); in between each poll only asks for items added after the
+    # newest one already held, which is usually nothing.
+
+    def __init__(self, lib_type):
+        self.lib_type = lib_type
+        self.limit = int(os.getenv('PLEX_RECENT_LIMIT', RECENT_LIMIT))
+        self.per_section = int(os.getenv('PLEX_RECENT_PER_SECTION', RECENT_PER_SECTION))
+        self.resync = float(os.getenv('PLEX_RECENT_RESYNC', RECENT_RESYNC))
+        self.plex_url = None
+        self.sections = {}  # section key -> [(addedAt, ratingKey, item)], newest first
+        self.cursors = {}   # section key -> newest addedAt seen
+        self.synced_at = None
+
+    def invalidate(self):
+        # Forces a full read next time, e.g. after items were deleted
+        self.synced_at = None
+
+    async def _section_keys(self, session, plex_url, plex_token):
+        url = f"{plex_url}/library/sections"
+        async with session.get(url, headers={**HEADERS, 'X-Plex-Token': plex_token}) as response:
+            if response.status != 200:
+                raise PlexError(f'Plex HTTP {response.status}')
+            data = await response.json()
+        section_type = SECTION_TYPES[self.lib_type]
+        return [d['key'] for d in data.get('MediaContainer', {}).get('Directory', []) if d.get('type') == section_type]
+
+    async def _refresh_section(self, session, plex_url, plex_token, key):
+        params = {
+            'type': self.lib_type,
             'sort': 'addedAt:desc',
-            'limit': limit,
+            'X-Plex-Container-Start': 0,
+            'X-Plex-Container-Size': self.per_section,
             'X-Plex-Token': plex_token
-        })
-        
-        try:
-            url = f"{plex_url}/library/all?{params}"
-            async with session.get(url, headers=headers, timeout=10) as response:
-                if response.status != 200:
-                     return {'error': f'Plex HTTP {response.status}'}
-                data = await response.json()
-            
-            items = []
-            if 'MediaContainer' in data and 'Metadata' in data['MediaContainer']:
-                for item in data['MediaContainer']['Metadata']:
-                    title = item.get('title')
-                    if lib_type == 4: # Shows
-                        grandparent = item.get('grandparentTitle', '')
-                        parent = item.get('parentTitle', '') # Season
-                        # Plex often puts show title in grandparentTitle for episodes
-                        if grandparent:
-                            title = f"{grandparent}" 
-                        
-                        # Use series poster (grandparentThumb) if available, else fallback to episode thumb
-                        thumb_path = item.get('grandparentThumb') or item.get('thumb')
-                        
-                        items.append({
-                            'title': title,
-                            'episode': item.get('title'), # Episode name
-                            'thumb': f"{plex_url}{thumb_path}?X-Plex-Token={plex_token}" if thumb_path else None
-                        })
-                    else:
-                        items.append({
-                            'title': title,
-                            'year': item.get('year'),
-                            'thumb': f"{plex_url}{item.get('thumb')}?X-Plex-Token={plex_token}" if item.get('thumb') else None
-                        })
-            return items
-        except asyncio.TimeoutError:
-            return {'error': 'Plex Connection Timeout'}
-        except aiohttp.ClientError as e:
-            return {'error': f'Plex Connection Error: {str(e)}'}
-        except Exception as e:
-            return {'error': f'Plex: {str(e)}'}
-
-    async def get_latest_session():
-        try:
-            url = f"{plex_url}/status/sessions"
-            req_headers = {**headers, 'X-Plex-Token': plex_token}
-            async with session.get(url, headers=req_headers, timeout=5) as response:
-                 if response.status != 200:
-                     return []
-                 data = await response.json()
-            
-            if 'MediaContainer' in data and data['MediaContainer'].get('size', 0) > 0:
-                sessions = []
-                metadata = data['MediaContainer'].get('Metadata', [])
-                for item in metadata:
-                    user = item.get('User', {}).get('title', 'Unknown User')
-                    user_thumb = item.get('User', {}).get('thumb')
-                    if user_thumb:
-                        user_thumb = f"{user_thumb}?X-Plex-Token={plex_token}" 
-                    
-                    title = item.get('title')
-                    # If episode
-                    if item.get('type') == 'episode':
-                        grandparent = item.get('grandparentTitle')
-                        if grandparent:
-                            title = f"{grandparent} - {title}"
-                    
-                    thumb = item.get('thumb')
-                    if thumb:
-                        thumb = f"{plex_url}{thumb}?X-Plex-Token={plex_token}"
-
-                    sessions.append({
-                        'user': user,
-                        'user_thumb': user_thumb,
-                        'title': title,
-                        'thumb': thumb,
-                        'year': item.get('year'),
-                        'type': item.get('type')
-                    })
-                return sessions
-            return []
-        except Exception:
-            return []
+        }
+        cursor = self.cursors.get(key)
+        if cursor is not None:
+            params['addedAt>>'] = cursor  # Plex filter: addedAt>>=<cursor>, i.e. added after
 
-    try:
-        # We can run these in parallel too if we wanted, but for now sequential inside the plex fetch is fine
-        # explicitly enabling parallel here too
-        results = await asyncio.gather(
-            get_recent_items(1),
-            get_recent_items(4),
-            get_latest_session(),
-            return_exceptions=True
-        )
-
-        recent_movies = results[0] if not isinstance(results[0], Exception) else {'error': str(results[0])}
-        recent_shows = results[1] if not isinstance(results[1], Exception) else {'error': str(results[1])}
-        active_sessions = results[2] if not isinstance(results[2], Exception) else []
-
-        # Error bubbling remains similar logic
-        if isinstance(recent_movies, dict) and 'error' in recent_movies:
-             # Just return it to show the error on the card
-             pass 
+        url = f"{plex_url}/library/sections/{key}/all?{urllib.parse.urlencode(params)}"
+        async with session.get(url, headers=HEADERS) as response:
+            if response.status != 200:
+                raise PlexError(f'Plex HTTP {response.status}')
+            data = await response.json()
 
-        return {
-            'movies': recent_movies,
-            'shows': recent_shows,
-            'active_sessions': active_sessions
-        }
-    except Exception as e:
+        metadata = data.get('MediaContainer', {}).get('Metadata', [])
+        if not metadata:
+            return
+
+        entries = self.sections.setdefault(key, [])
+        new_keys = {item.get('ratingKey') for item in metadata}
+        entries[:] = [entry for entry in entries if entry[1] not in new_keys]
+        entries.extend((item.get('addedAt', 0), item.get('ratingKey'), format_recent_item(item, self.lib_type))
+                       for item in metadata)
+        entries.sort(key=lambda entry: entry[0], reverse=True)
+        del entries[self.per_section:]
+        self.cursors[key] = entries[0][0]
+
+    async def refresh(self, session, plex_url, plex_token):
+        if plex_url != self.plex_url:
+            self.plex_url = plex_url
+            self.sections.clear()
+            self.invalidate()
+
+        now = time.monotonic()
+        if self.synced_at is None or now - self.synced_at > self.resync:
+            keys = await self._section_keys(session, plex_url, plex_token)
+            self.sections = {key: [] for key in keys}
+            self.cursors = {}
+            self.synced_at = now
+
+        await asyncio.gather(*[self._refresh_section(session, plex_url, plex_token, key) for key in self.sections])
+
+    def items(self, limit=None):
+        limit = limit or self.limit
+        entries = [entry for section in self.sections.values() for entry in section]
+        return [item for _, _, item in heapq.nlargest(limit, entries, key=lambda entry: entry[0])]
+
+
+_recent = {}  # lib_type -> RecentlyAdded, created on first use
+
+def invalidate_recent():
+    for recent in _recent.values():
+        recent.invalidate()
+
+async def get_recent_items(session, plex_url, plex_token, lib_type, limit=None):
+    # type 1 = Movie, type 4 = Episode
+    recent = _recent.get(lib_type)
+    if recent is None:
+        recent = _recent[lib_type] = RecentlyAdded(lib_type)
+    try:
+        await recent.refresh(session, plex_url, plex_token)
+        return recent.items(limit)
+    except PlexError as e:
+        recent.invalidate()
         return {'error': str(e)}
+    except asyncio.TimeoutError:
+        return {'error': 'Plex Connection Timeout'}
+    except aiohttp.ClientError as e:
+        return {'error': f'Plex Connection Error: {str(e)}'}
+    except Exception as e:
+        return {'error': f'Plex: {str(e)}'}
+
+async def get_latest_session(session, plex_url, plex_token):
+    try:
+        url = f"{plex_url}/status/sessions"
+        req_headers = {**HEADERS, 'X-Plex-Token': plex_token}
+        async with session.get(url, headers=req_headers) as response:
+             if response.status != 200:
+                 return []
+             data = await response.json()
+
+        if 'MediaContainer' in data and data['MediaContainer'].get('size', 0) > 0:
+            sessions = []
+            metadata = data['MediaContainer'].get('Metadata', [])
+            for item in metadata:
+                user = item.get('User', {}).get('title', 'Unknown User')
+                user_thumb = plextv_image(item.get('User', {}).get('thumb'), AVATAR_WIDTH)
+
+                title = item.get('title')
+                # If episode
+                if item.get('type') == 'episode':
+                    grandparent = item.get('grandparentTitle')
+                    if grandparent:
+                        title = f"{grandparent} - {title}"
+
+                thumb = plex_image(item.get('thumb'), HERO_WIDTH)
+
+                sessions.append({
+                    'session_key': item.get('sessionKey'),
+                    'user': user,
+                    'user_thumb': user_thumb,
+                    'title': title,
+                    'thumb': thumb,
+                    'year': item.get('year'),
+                    'type': item.get('type')
+                })
+            return sessions
+        return []
+    except Exception:
+        return []
+
+async def fetch_plex_recent(session):
+    config = plex_config()
+    if not config:
+        return {'error': 'Plex not configured'}
+
+    results = await asyncio.gather(
+        get_recent_items(session, *config, 1),
+        get_recent_items(session, *config, 4),
+        return_exceptions=True
+    )
+    recent_movies = results[0] if not isinstance(results[0], Exception) else {'error': str(results[0])}
+    recent_shows = results[1] if not isinstance(results[1], Exception) else {'error': str(results[1])}
+
+    return {
+        'movies': recent_movies,
+        'shows': recent_shows
+    }
+
+async def fetch_plex_sessions(session):
+    config = plex_config()
+    if not config:
+        return {'error': 'Plex not configured'}
+
+    try:
+        active_sessions = await get_latest_session(session, *config)
+    except Exception:
+        active_sessions = []
+    return {'active_sessions': active_sessions}
@@ -1,149 +1,402 @@
 import aiohttp
 import asyncio
+import heapq
 import urllib.parse
 import json
 import os
+import time
 
-async def fetch_qbittorrent_data(session):
-    base_url = os.getenv('QBITTORRENT_URL')
-    username = os.getenv('QBITTORRENT_USERNAME')
-    password = os.getenv('QBITTORRENT_PASSWORD')
-    
-    if not base_url:
-        return {'error': 'Qbittorrent URL not configured'}
+from instances import instance_env, service_instances
+from json_stream import SCALAR_EVENTS, json_events, streaming
+from metrics import cache_requests
 
-    base_url = base_url.rstrip('/')
-    
-    # We use the shared session, but qBittorrent needs cookies for auth.
-    # aiohttp ClientSession handles cookies automatically if we reuse it.
-    # However, if 'session' is shared across different services (Plex, Sonarr), 
-    # we need to ensure we don't leak cookies or conflicts?
-    # Actually, aiohttp session cookie jar is shared. qBit sets a cookie 'SID'. 
-    # It shouldn't conflict with others usually (Plex uses headers, Arrs use headers).
-    # BUT, if we want to be safe or if the passed session doesn't persist cookies correctly for this flow:
-    # We might want to just login every time or rely on the session.
-    # Let's assume the passed 'session' is a fresh one specific to the request or a global one.
-    # If it's a global one, we should be fine. If it's per-request, we login once.
-    
-    headers = {'User-Agent': 'MediaDashboard/1.0'}
+HEADERS = {'User-Agent': 'MediaDashboard/1.0'}
 
-    try:
-        # 1. Login
-        if username and password:
-            login_data = {'username': username, 'password': password}
-            # Login
-            async with session.post(f"{base_url}/api/v2/auth/login", data=login_data, headers=headers, timeout=5) as login_resp:
+STATUS_MAP = {
+    'error': 'Error',
+    'missingFiles': 'Missing Files',
+    'uploading': 'Seeding',
+    'pausedUP': 'Seeding',
+    'queuedUP': 'Seeding',
+    'stalledUP': 'Seeding',
+    'checkingUP': 'Checking',
+    'forcedUP': 'Seeding',
+    'allocating': 'Allocating',
+    'downloading': 'Downloading',
+    'metaDL': 'Downloading',
+    'pausedDL': 'Paused',
+    'queuedDL': 'Queued',
+    'stalledDL': 'Stalled',
+    'checkingDL': 'Checking',
+    'forcedDL': 'Downloading',
+    'checkingResumeData': 'Checking',
+    'moving': 'Moving'
+}
+
+RECENT_LIMIT = 20
+ERROR_LIMIT = 500
+
+# Torrents in these states are shown as errored even without a tracker message
+ERROR_STATES = ('error', 'missingFiles', 'metaDL')
+
+# Torrents that are not contacting trackers on purpose, so an empty current
+# tracker says nothing about tracker health
+INACTIVE_STATES = ('pausedUP', 'pausedDL', 'stoppedUP', 'stoppedDL', 'queuedUP', 'queuedDL')
+
+# Tracker lookups for errored torrents: how many run at once, how long a
+# resolved message is reused, and how long a poll waits before reporting the
+# rest as pending (unfinished lookups keep running and land in the cache).
+# QBIT_TRACKER_CONCURRENCY, QBIT_TRACKER_CACHE_TTL and QBIT_TRACKER_TIME_BUDGET
+# override them, read per client so .env applies
+TRACKER_CONCURRENCY = 8
+TRACKER_CACHE_TTL = 300
+TRACKER_TIME_BUDGET = 2
+
+UNKNOWN_ERROR = 'Unknown Error'
+
+# Bulk actions: Web API endpoint, plus the pre-5.0 name where qBittorrent
+# renamed it (pause/resume became stop/start)
+TORRENT_ACTIONS = {
+    'delete': ('/api/v2/torrents/delete', None),
+    'pause': ('/api/v2/torrents/stop', '/api/v2/torrents/pause'),
+    'resume': ('/api/v2/torrents/start', '/api/v2/torrents/resume'),
+    'recheck': ('/api/v2/torrents/recheck', None),
+    'reannounce': ('/api/v2/torrents/reannounce', None)
+}
+
+# Hashes per call; qBittorrent takes them pipe-joined in one form field
+ACTION_BATCH_SIZE = 200
+PENDING = 'Pending'
+
+
+# The only torrent and server_state fields the dashboard reads; everything
+# else in sync/maindata is dropped while parsing
+TORRENT_FIELDS = ('name', 'state', 'progress', 'dlspeed', 'added_on', 'tracker')
+SERVER_STATE_FIELDS = ('dl_info_data', 'up_info_data', 'dl_info_speed', 'up_info_speed')
+
+
+class TorrentRecord:
+    # One torrent of the local mirror. Slots instead of a dict of every field
+    # qBittorrent reports keeps a 10k-torrent mirror small; get() and [] keep
+    # it usable wherever a torrent dict was.
+
+    __slots__ = ('hash',) + TORRENT_FIELDS
+
+    def __init__(self, t_hash):
+        self.hash = t_hash
+        for field in TORRENT_FIELDS:
+            setattr(self, field, None)
+
+    def update(self, changes):
+        for field, value in changes.items():
+            setattr(self, field, value)
+
+    def get(self, field, default=None):
+        value = getattr(self, field, None)
+        return default if value is None else value
+
+    def __getitem__(self, field):
+        return getattr(self, field)
+
+
+def pick(data, fields):
+    return {field: data[field] for field in fields if field in data}
+
+async def read_maindata(resp):
+    # The parts of a sync/maindata response the dashboard uses, with torrents
+    # and server_state cut down to the fields above. When ijson is available
+    # the body is parsed as it streams in, so the full (often multi-megabyte)
+    # tree is never built.
+    if not streaming():
+        data = await resp.json()
+        return {
+            'rid': data.get('rid', 0),
+            'full_update': data.get('full_update', False),
+            'torrents': {h: pick(t, TORRENT_FIELDS) for h, t in (data.get('torrents') or {}).items()},
+            'torrents_removed': data.get('torrents_removed') or [],
+            'server_state': pick(data.get('server_state') or {}, SERVER_STATE_FIELDS)
+        }
+
+    data = {'rid': 0, 'full_update': False, 'torrents': {}, 'torrents_removed': [], 'server_state': {}}
+    torrent = None
+    async for prefix, event, value in json_events(resp):
+        if event == 'map_key' and prefix == 'torrents':
+            torrent = data['torrents'][value] = {}
+        elif event not in SCALAR_EVENTS:
+            continue
+        elif prefix in ('rid', 'full_update'):
+            data[prefix] = value
+        elif prefix == 'torrents_removed.item':
+            data['torrents_removed'].append(value)
+        else:
+            section, _, field = prefix.rpartition('.')
+            if section.startswith('torrents.') and section.count('.') == 1 and field in TORRENT_FIELDS:
+                torrent[field] = value
+            elif section == 'server_state' and field in SERVER_STATE_FIELDS:
+                data['server_state'][field] = value
+    return data
+
+
+class QBittorrentError(Exception):
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class QBittorrentClient:
+    # Holds on to qBittorrent's SID cookie (kept in the session's cookie jar)
+    # and only logs in again when the Web API answers 403. qBittorrent bans
+    # IPs after too many logins, so logging in on every poll is not an option.
+
+    def __init__(self, session, base_url, username=None, password=None):
+        self.session = session
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self._login_lock = asyncio.Lock()
+        self._auth_generation = 0
+
+        # Local mirror of qBittorrent's torrent list, kept current from
+        # sync/maindata deltas (only changed fields are sent after the first)
+        self.rid = 0
+        self.torrents = {}
+        self.server_state = {}
+        # Pre-5.0 qBittorrent (no stop/start); found on the first 404
+        self.legacy_actions = False
+
+        self.tracker_cache_ttl = float(os.getenv('QBIT_TRACKER_CACHE_TTL', TRACKER_CACHE_TTL))
+        self.tracker_time_budget = float(os.getenv('QBIT_TRACKER_TIME_BUDGET', TRACKER_TIME_BUDGET))
+        self._tracker_cache = {}  # hash -> (state, message, expires_at)
+        self._tracker_tasks = {}  # hash -> in-flight lookup
+        self._tracker_semaphore = asyncio.Semaphore(int(os.getenv('QBIT_TRACKER_CONCURRENCY', TRACKER_CONCURRENCY)))
+
+    @property
+    def has_credentials(self):
+        return bool(self.username and self.password)
+
+    async def _login(self, generation):
+        # Every caller that saw the same expired session passes the same
+        # generation; the first one in logs in, the rest reuse its result
+        async with self._login_lock:
+            if self._auth_generation != generation:
+                return
+            login_data = {'username': self.username, 'password': self.password}
+            async with self.session.post(f"{self.base_url}/api/v2/auth/login", data=login_data, headers=HEADERS) as login_resp:
                 if login_resp.status != 200:
-                     return {'error': f'Qbittorrent Login HTTP {login_resp.status}'}
+                    raise QBittorrentError(f'Qbittorrent Login HTTP {login_resp.status}')
                 text = await login_resp.text()
                 if "Fails." in text:
-                    return {'error': 'Qbittorrent Login Failed'}
-
-        # 2. Get Torrents
-        async with session.get(f"{base_url}/api/v2/torrents/info?sort=added_on&reverse=true&limit=20", headers=headers, timeout=5) as resp:
-            if resp.status != 200:
-                return {'error': f'Qbittorrent Info HTTP {resp.status}'}
-            torrents = await resp.json()
-        
-        status_map = {
-            'error': 'Error',
-            'missingFiles': 'Missing Files',
-            'uploading': 'Seeding',
-            'pausedUP': 'Seeding',
-            'queuedUP': 'Seeding',
-            'stalledUP': 'Seeding',
-            'checkingUP': 'Checking',
-            'forcedUP': 'Seeding',
-            'allocating': 'Allocating',
-            'downloading': 'Downloading',
-            'metaDL': 'Downloading',
-            'pausedDL': 'Paused',
-            'queuedDL': 'Queued',
-            'stalledDL': 'Stalled',
-            'checkingDL': 'Checking',
-            'forcedDL': 'Downloading',
-            'checkingResumeData': 'Checking',
-            'moving': 'Moving'
-        }
+                    raise QBittorrentError('Qbittorrent Login Failed')
+            self._auth_generation += 1
+
+    async def request(self, method, path, parse_json=True, parser=None, **kwargs):
+        # `parser` is an optional coroutine reading the response in place of
+        # the default JSON/text handling
+        if self.has_credentials and self._auth_generation == 0:
+            await self._login(0)
+
+        for attempt in range(2):
+            generation = self._auth_generation
+            async with self.session.request(method, f"{self.base_url}{path}", headers=HEADERS, **kwargs) as resp:
+                if resp.status != 403 or attempt > 0 or not self.has_credentials:
+                    if resp.status != 200:
+                        raise QBittorrentError(f'Qbittorrent HTTP {resp.status} on {path}', resp.status)
+                    if parser:
+                        return await parser(resp)
+                    if parse_json:
+                        return await resp.json()
+                    return await resp.text()
+            # SID expired (or qBittorrent restarted), log in again and retry once
+            await self._login(generation)
+
+    async def sync(self):
+        data = await self.get(f"/api/v2/sync/maindata?rid={self.rid}", parser=read_maindata)
+
+        if data['full_update']:
+            self.torrents = {}
+            self.server_state = {}
+
+        for t_hash, changes in data['torrents'].items():
+            torrent = self.torrents.get(t_hash)
+            if torrent is None:
+                torrent = self.torrents[t_hash] = TorrentRecord(t_hash)
+            torrent.update(changes)
+
+        for t_hash in data['torrents_removed']:
+            self.torrents.pop(t_hash, None)
+
+        self.server_state.update(data['server_state'])
+        self.rid = data['rid']
+
+    async def _lookup_tracker_message(self, t_hash, state):
+        async with self._tracker_semaphore:
+            try:
+                trackers = await self.get(f"/api/v2/torrents/trackers?hash={t_hash}")
+            except Exception:
+                # Not cached, so the next poll tries again
+                return
+
+        error_msg = UNKNOWN_ERROR
+        for tracker in trackers:
+            msg = tracker.get('msg', '')
+            if not msg or "this torrent is private" in msg.lower() or msg.lower() == "ok":
+                continue
+            error_msg = msg
+            break
+        self._tracker_cache[t_hash] = (state, error_msg, time.monotonic() + self.tracker_cache_ttl)
 
-        recent_downloads = []
+    def _cached_tracker_message(self, t_hash, state, now):
+        cached = self._tracker_cache.get(t_hash)
+        # A state change means the cached message may no longer apply
+        if cached and cached[0] == state and cached[2] > now:
+            return cached[1]
+        return None
+
+    async def tracker_messages(self, torrents):
+        # Returns hash -> tracker message, or PENDING for lookups that did not
+        # finish within the time budget
+        now = time.monotonic()
+        self._tracker_cache = {h: c for h, c in self._tracker_cache.items() if c[2] > now}
+
+        messages = {}
+        waiting = []
         for torrent in torrents:
+            t_hash = torrent['hash']
             state = torrent.get('state', 'unknown')
-            readable_state = status_map.get(state, state)
-            dlspeed = torrent.get('dlspeed', 0)
-            progress = torrent.get('progress', 0) * 100
-            
-            recent_downloads.append({
-                'name': torrent.get('name'),
-                'state': readable_state,
-                'dlspeed': dlspeed,
-                'progress': f"{progress:.1f}%"
-            })
+            cached = self._cached_tracker_message(t_hash, state, now)
+            if cached is not None:
+                cache_requests.inc('qbit_trackers', 'hit')
+                messages[t_hash] = cached
+                continue
+            cache_requests.inc('qbit_trackers', 'miss')
+
+            task = self._tracker_tasks.get(t_hash)
+            if task is None:
+                task = asyncio.create_task(self._lookup_tracker_message(t_hash, state))
+                self._tracker_tasks[t_hash] = task
+                task.add_done_callback(lambda _, t_hash=t_hash: self._tracker_tasks.pop(t_hash, None))
+            waiting.append((t_hash, state, task))
+
+        if waiting:
+            await asyncio.wait([task for _, _, task in waiting], timeout=self.tracker_time_budget)
+
+        now = time.monotonic()
+        for t_hash, state, task in waiting:
+            if not task.done():
+                messages[t_hash] = PENDING
+            else:
+                messages[t_hash] = self._cached_tracker_message(t_hash, state, now) or UNKNOWN_ERROR
+        return messages
+
+    def forget_tracker_messages(self, hashes):
+        for t_hash in hashes:
+            self._tracker_cache.pop(t_hash, None)
+
+    async def get(self, path, **kwargs):
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path, data=None, **kwargs):
+        return await self.request('POST', path, parse_json=False, data=data, **kwargs)
+
+
+_clients = {}  # instance number -> QBittorrentClient
+
+def get_client(session, instance=1):
+    # One long-lived client per instance so the SID survives between polls
+    base_url = instance_env('QBITTORRENT', 'URL', instance)
+    if not base_url:
+        return None
+
+    base_url = base_url.rstrip('/')
+    username = instance_env('QBITTORRENT', 'USERNAME', instance)
+    password = instance_env('QBITTORRENT', 'PASSWORD', instance)
+
+    client = _clients.get(instance)
+    if (client is None or client.session is not session or client.base_url != base_url
+            or client.username != username or client.password != password):
+        client = QBittorrentClient(session, base_url, username, password)
+        _clients[instance] = client
+    return client
+
+def format_torrent(torrent):
+    state = torrent.get('state', 'unknown')
+    progress = torrent.get('progress', 0) * 100
+    return {
+        'hash': torrent.get('hash'),
+        'name': torrent.get('name'),
+        'state': STATUS_MAP.get(state, state),
+        'dlspeed': torrent.get('dlspeed', 0),
+        'progress': f"{progress:.1f}%",
+        'added_on': torrent.get('added_on', 0)
+    }
+
+def error_candidates(torrents):
+    # Torrents worth asking about tracker messages: errored ones, plus active
+    # ones that currently have no working tracker
+    candidates = []
+    for torrent in torrents:
+        state = torrent.get('state', 'unknown')
+        if state in ERROR_STATES or (not torrent.get('tracker') and state not in INACTIVE_STATES):
+            candidates.append(torrent)
+            if len(candidates) >= ERROR_LIMIT:
+                break
+    return candidates
+
+async def fetch_qbittorrent_data(session, instance=1):
+    client = get_client(session, instance)
+    if not client:
+        return {'error': 'Qbittorrent URL not configured'}
+
+    try:
+        # 1. Bring the local torrent table up to date
+        await client.sync()
+
+        torrents = list(client.torrents.values())
+        by_added = lambda t: t.get('added_on', 0)
+
+        recent_downloads = [format_torrent(t) for t in heapq.nlargest(RECENT_LIMIT, torrents, key=by_added)]
+        downloading = [t for t in torrents if STATUS_MAP.get(t.get('state')) == 'Downloading']
+        active_downloads = [format_torrent(t) for t in heapq.nlargest(RECENT_LIMIT, downloading, key=by_added)]
+
+        # 2. Resolve tracker messages for errored torrents
+        candidates = error_candidates(torrents)
+        messages = await client.tracker_messages(candidates)
 
-        # 3. Get Error Count
-        error_limit = 500
         errored_torrents = []
-        try:
-            async with session.get(f"{base_url}/api/v2/torrents/info?filter=error&limit={error_limit}", headers=headers, timeout=5) as error_resp:
-                 if error_resp.status == 200:
-                    errors_data = await error_resp.json()
-                    
-                    for err in errors_data:
-                        error_msg = 'Unknown Error'
-                        t_hash = err.get('hash')
-                        
-                        if t_hash:
-                            try:
-                                async with session.get(f"{base_url}/api/v2/torrents/trackers?hash={t_hash}", headers=headers, timeout=5) as trackers_resp:
-                                    if trackers_resp.status == 200:
-                                        trackers = await trackers_resp.json()
-                                        for tracker in trackers:
-                                            msg = tracker.get('msg', '')
-                                            if not msg or "this torrent is private" in msg.lower() or msg.lower() == "ok":
-                                                continue
-                                            error_msg = msg
-                                            break
-                            except Exception:
-                                pass 
-                        
-                        state = err.get('state', 'unknown')
-                        if error_msg == 'Unknown Error' and state not in ['error', 'missingFiles', 'metaDL']:
-                            continue
-
-                        errored_torrents.append({
-                            'name': err.get('name'),
-                            'hash': err.get('hash'),
-                            'state': state,
-                            'message': error_msg
-                        })
-        except Exception:
-            pass
-
-        # 4. Get Global Transfer Info
-        transfer_info = {}
-        try:
-            async with session.get(f"{base_url}/api/v2/transfer/info", headers=headers, timeout=5) as transfer_resp:
-                if transfer_resp.status == 200:
-                    t_data = await transfer_resp.json()
-                    transfer_info = {
-                        'dl_info_data': t_data.get('dl_info_data', 0),
-                        'up_info_data': t_data.get('up_info_data', 0),
-                        'dl_info_speed': t_data.get('dl_info_speed', 0),
-                        'up_info_speed': t_data.get('up_info_speed', 0)
-                    }
-                else:
-                    print(f"[qbit] transfer/info returned HTTP {transfer_resp.status}")
-        except Exception as e:
-            print(f"[qbit] transfer/info failed: {e}")
+        for err in candidates:
+            t_hash = err['hash']
+            error_msg = messages.get(t_hash, UNKNOWN_ERROR)
+
+            state = err.get('state', 'unknown')
+            if error_msg == UNKNOWN_ERROR and state not in ERROR_STATES:
+                continue
+
+            errored_torrents.append({
+                'name': err.get('name'),
+                'hash': t_hash,
+                'state': state,
+                'message': error_msg
+            })
+
+        # 3. Global transfer info comes along in server_state
+        transfer_info = {
+            'dl_info_data': client.server_state.get('dl_info_data', 0),
+            'up_info_data': client.server_state.get('up_info_data', 0),
+            'dl_info_speed': client.server_state.get('dl_info_speed', 0),
+            'up_info_speed': client.server_state.get('up_info_speed', 0)
+        }
 
         return {
             'recent': recent_downloads,
-            'active_downloads': [t for t in recent_downloads if t['state'] == 'Downloading'],
+            'active_downloads': active_downloads,
+            'active_count': len(downloading),
             'error_count': len(errored_torrents),
             'errored_torrents': errored_torrents,
             'transfer_info': transfer_info
         }
 
+    except QBittorrentError as e:
+        return {'error': str(e)}
     except asyncio.TimeoutError:
          return {'error': 'Qbittorrent Connection Timeout'}
     except aiohttp.ClientError as e:
@@ -151,36 +404,96 @@ async def fetch_qbittorrent_data(session):
     except Exception as e:
         return {'error': str(e)}
 
-async def delete_torrent(session, torrent_hash, delete_files=False):
-    base_url = os.getenv('QBITTORRENT_URL')
-    username = os.getenv('QBITTORRENT_USERNAME')
-    password = os.getenv('QBITTORRENT_PASSWORD')
-    
-    if not base_url:
+async def torrent_action(session, action, hashes, delete_files=False, instance=1):
+    client = get_client(session, instance)
+    if not client:
         return {'error': 'Qbittorrent URL not configured'}
+    if action not in TORRENT_ACTIONS:
+        return {'error': f'Unknown action: {action}'}
+
+    path, legacy_path = TORRENT_ACTIONS[action]
+    if client.legacy_actions and legacy_path:
+        path, legacy_path = legacy_path, None
+    hashes = list(dict.fromkeys(hashes))
 
-    base_url = base_url.rstrip('/')
-    headers = {'User-Agent': 'MediaDashboard/1.0'}
-    
     try:
-        # Login (if session not already authenticated - strictly we should ensure auth)
-        if username and password:
-             login_data = {'username': username, 'password': password}
-             async with session.post(f"{base_url}/api/v2/auth/login", data=login_data, headers=headers, timeout=5) as login_resp:
-                if login_resp.status != 200:
-                      return {'error': 'Qbittorrent login failed'}
+        for i in range(0, len(hashes), ACTION_BATCH_SIZE):
+            post_data = {'hashes': '|'.join(hashes[i:i + ACTION_BATCH_SIZE])}
+            if action == 'delete':
+                post_data['deleteFiles'] = 'true' if delete_files else 'false'
+            try:
+                await client.post(path, data=post_data)
+            except QBittorrentError as e:
+                if e.status != 404 or not legacy_path:
+                    raise
+                # Older qBittorrent: switch to the old endpoint for good
+                client.legacy_actions = True
+                path, legacy_path = legacy_path, None
+                await client.post(path, data=post_data)
 
-        # Delete
-        post_data = {
-            'hashes': torrent_hash,
-            'deleteFiles': 'true' if delete_files else 'false'
-        }
-        
-        async with session.post(f"{base_url}/api/v2/torrents/delete", data=post_data, headers=headers, timeout=5) as resp:
-             if resp.status != 200:
-                 return {'error': f'Delete failed with HTTP {resp.status}'}
-        
-        return {'success': True}
+        # Whatever the tracker said before may no longer hold
+        client.forget_tracker_messages(hashes)
+        return {'success': True, 'count': len(hashes)}
 
+    except QBittorrentError as e:
+        return {'error': str(e)}
     except Exception as e:
         return {'error': str(e)}
+
+async def delete_torrent(session, torrent_hash, delete_files=False, instance=1):
+    return await torrent_action(session, 'delete', [torrent_hash], delete_files, instance)
+
+def group_by_instance(torrents, instances):
+    # Splits torrents by instance number. Each is a hash, or {hash, instance}
+    # with the instance label the dashboard showed it under, which is where
+    # it goes; the same hash can exist on several instances. Bare hashes go
+    # to the instance whose torrent table has them, else the first one.
+    by_label = {instance.label: number for number, instance in instances.items()}
+    groups = {}
+    for torrent in torrents:
+        if isinstance(torrent, dict):
+            t_hash, owner = torrent.get('hash'), by_label.get(torrent.get('instance'))
+        else:
+            t_hash, owner = torrent, None
+        if owner is None:
+            owner = next((n for n in instances if n in _clients and t_hash in _clients[n].torrents), min(instances))
+        groups.setdefault(owner, []).append(t_hash)
+    return groups
+
+async def torrent_action_all(sessions, action, torrents, delete_files=False):
+    # Sends each torrent (see group_by_instance) to its instance, all
+    # instances at once, and reports one combined result. `sessions` is
+    # keyed by instance id.
+    instances = {instance.number: instance for instance in service_instances('qbittorrent')}
+    groups = group_by_instance(torrents, instances)
+    results = await asyncio.gather(*[
+        torrent_action(sessions[instances[number].id], action, group, delete_files, number)
+        for number, group in groups.items()
+    ])
+
+    errors = [result['error'] for result in results if 'error' in result]
+    if errors:
+        return {'error': '; '.join(errors)}
+    return {'success': True, 'count': sum(result.get('count', 0) for result in results)}
+
+def combine_qbittorrent(results):
+    # Merges several instances' cards, [(label, data)], into one: lists are
+    # tagged with their instance, transfer stats are summed
+    def tagged(key):
+        return [{**item, 'instance': label} for label, data in results for item in data.get(key, [])]
+
+    by_added = lambda t: t.get('added_on', 0)
+    transfer_info = {}
+    for _, data in results:
+        for key, value in (data.get('transfer_info') or {}).items():
+            transfer_info[key] = transfer_info.get(key, 0) + value
+
+    errored_torrents = tagged('errored_torrents')
+    return {
+        'recent': heapq.nlargest(RECENT_LIMIT, tagged('recent'), key=by_added),
+        'active_downloads': heapq.nlargest(RECENT_LIMIT, tagged('active_downloads'), key=by_added),
+        'active_count': sum(data.get('active_count', 0) for _, data in results),
+        'error_count': len(errored_torrents),
+        'errored_torrents': errored_torrents,
+        'transfer_info': transfer_info
+    }
@@ -0,0 +1,227 @@
+import array
+import asyncio
+import math
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from collector import env_interval
+from storage import cache_dir
+
+# History of a few headline numbers for sparklines. Every sample interval the
+# recorder reads them from the collector's data into fixed-size ring buffers
+# at three resolutions; each bucket holds the mean of the samples that fell
+# into it. Memory never grows, a sample is a few array writes per tier and a
+# query reads only the buckets it returns. Tiers are saved to SQLite in the
+# cache dir so history survives restarts.
+
+# Seconds between samples and between saves; HISTORY_SAMPLE_INTERVAL and
+# HISTORY_SAVE_INTERVAL override them, read when the recorder is created
+SAMPLE_INTERVAL = 1
+SAVE_INTERVAL = 300
+
+METRICS = ('dl_speed', 'up_speed', 'active_downloads', 'queue', 'plex_sessions')
+
+# name -> (seconds per bucket, buckets kept)
+TIERS = {
+    '1s': (1, 3600),     # last hour
+    '1m': (60, 1440),    # last day
+    '1h': (3600, 720),   # last 30 days
+}
+
+MISSING = float('nan')
+
+def fresh(data, service):
+    # A failing service keeps its last good data with error/stale_since set;
+    # sampling those frozen numbers would draw the outage as a flat line
+    # rather than a gap
+    card = data.get(service) or {}
+    return {} if 'error' in card or 'stale_since' in card else card
+
+def sample(data):
+    # One value per METRICS entry; NaN where the service has nothing to say
+    # (not configured, never reached, currently failing)
+    qbit = fresh(data, 'qbittorrent')
+    transfer = qbit.get('transfer_info')
+    plex = fresh(data, 'plex')
+    arr_activity = [fresh(data, service).get('activity') for service in ('sonarr', 'radarr')]
+    known_activity = [activity for activity in arr_activity if activity is not None]
+    return (
+        transfer.get('dl_info_speed', 0) if transfer else MISSING,
+        transfer.get('up_info_speed', 0) if transfer else MISSING,
+        qbit.get('active_count', MISSING),
+        sum(item.get('count', 1) for activity in known_activity for item in activity) if known_activity else MISSING,
+        len(plex['active_sessions']) if 'active_sessions' in plex else MISSING
+    )
+
+class Tier:
+    # Ring buffer of `size` buckets of `step` seconds. Slot i holds bucket
+    # number b (= timestamp // step) where b % size == i; `buckets` records
+    # which one, so slots left over from an older lap read as gaps.
+
+    def __init__(self, step, size):
+        self.step = step
+        self.size = size
+        self.buckets = array.array('q', [-1]) * size
+        self.values = {metric: array.array('d', [MISSING]) * size for metric in METRICS}
+        self.current = None  # bucket being accumulated
+        self._reset()
+
+    def _reset(self):
+        # Per metric, so a missing (NaN) sample only leaves out itself rather
+        # than turning the whole bucket's mean into a gap
+        self.sums = [0.0] * len(METRICS)
+        self.counts = [0] * len(METRICS)
+
+    def add(self, timestamp, values):
+        bucket = int(timestamp // self.step)
+        if bucket != self.current:
+            self._flush()
+            self.current = bucket
+        for i, value in enumerate(values):
+            if not math.isnan(value):
+                self.sums[i] += value
+                self.counts[i] += 1
+
+    def _mean(self, index):
+        count = self.counts[index]
+        return self.sums[index] / count if count else MISSING
+
+    def _flush(self):
+        if self.current is None:
+            return
+        slot = self.current % self.size
+        self.buckets[slot] = self.current
+        for i, metric in enumerate(METRICS):
+            self.values[metric][slot] = self._mean(i)
+        self._reset()
+
+    def read(self, metric, first, last):
+        index = METRICS.index(metric)
+        series = self.values[metric]
+        points = []
+        for bucket in range(first, last + 1):
+            if bucket == self.current:
+                value = self._mean(index)
+            elif self.buckets[bucket % self.size] == bucket:
+                value = series[bucket % self.size]
+            else:
+                value = MISSING
+            points.append(None if math.isnan(value) else round(value, 2))
+        return points
+
+    def dump(self):
+        # name -> bytes, taken on the event loop so a save never sees a
+        # half-written sample. The bucket still being filled is saved as
+        # its running sums, so a restart carries on accumulating it.
+        current = -1 if self.current is None else self.current
+        return {'_buckets': self.buckets.tobytes(),
+                '_partial': array.array('d', [current, *self.sums, *self.counts]).tobytes(),
+                **{metric: series.tobytes() for metric, series in self.values.items()}}
+
+    def restore(self, blobs):
+        if len(blobs.get('_buckets', b'')) != self.size * self.buckets.itemsize:
+            return  # saved with a different size; start over
+        self.buckets = array.array('q', blobs['_buckets'])
+        for metric in METRICS:
+            if len(blobs.get(metric, b'')) == self.size * 8:
+                self.values[metric] = array.array('d', blobs[metric])
+
+        partial = array.array('d', blobs.get('_partial', b''))
+        if len(partial) == 1 + 2 * len(METRICS) and partial[0] >= 0:
+            n = len(METRICS)
+            self.current = int(partial[0])
+            self.sums = list(partial[1:1 + n])
+            self.counts = [int(count) for count in partial[1 + n:]]
+
+
+class HistoryRecorder:
+
+    def __init__(self, collector, path=None):
+        self.collector = collector
+        self.path = path or os.path.join(cache_dir(), 'history.sqlite3')
+        self.tiers = {name: Tier(step, size) for name, (step, size) in TIERS.items()}
+        self.sample_interval = env_interval('HISTORY_SAMPLE_INTERVAL', SAMPLE_INTERVAL)
+        self.save_interval = env_interval('HISTORY_SAVE_INTERVAL', SAVE_INTERVAL)
+        self._task = None
+
+    def start(self):
+        self._load()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            await self.save()
+
+    async def _run(self):
+        last_save = time.monotonic()
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            # Nothing has been fetched yet right after startup
+            if self.collector.version:
+                self.record(time.time(), sample(self.collector.data))
+            if time.monotonic() - last_save >= self.save_interval:
+                last_save = time.monotonic()
+                await self.save()
+
+    def record(self, timestamp, values):
+        for tier in self.tiers.values():
+            tier.add(timestamp, values)
+
+    def query(self, tier_name='1m', points=None, metrics=None):
+        # The last `points` buckets of one tier (all of them by default),
+        # oldest first, None where there was no data
+        tier = self.tiers.get(tier_name)
+        if tier is None:
+            return {'error': f"Unknown tier: {tier_name} (expected one of {', '.join(TIERS)})"}
+        metrics = metrics or list(METRICS)
+        unknown = [metric for metric in metrics if metric not in METRICS]
+        if unknown:
+            return {'error': f"Unknown metric: {', '.join(unknown)}"}
+
+        points = min(tier.size, max(1, points or tier.size))
+        last = int(time.time() // tier.step)
+        first = last - points + 1
+        return {
+            'tier': tier_name,
+            'step': tier.step,
+            'start': first * tier.step,
+            'series': {metric: tier.read(metric, first, last) for metric in metrics}
+        }
+
+    # ── Persistence ───────────────────────────────────────────────────────
+
+    def _connect(self):
+        db = sqlite3.connect(self.path)
+        db.execute('CREATE TABLE IF NOT EXISTS history (tier TEXT, name TEXT, data BLOB, PRIMARY KEY (tier, name))')
+        return db
+
+    def _load(self):
+        try:
+            with closing(self._connect()) as db:
+                rows = db.execute('SELECT tier, name, data FROM history').fetchall()
+        except sqlite3.Error as e:
+            print(f"History: could not read {self.path}: {e}")
+            return
+        saved = {}
+        for tier_name, name, data in rows:
+            saved.setdefault(tier_name, {})[name] = data
+        for tier_name, tier in self.tiers.items():
+            if tier_name in saved:
+                tier.restore(saved[tier_name])
+
+    def _write(self, rows):
+        with closing(self._connect()) as db, db:
+            db.executemany('INSERT OR REPLACE INTO history (tier, name, data) VALUES (?, ?, ?)', rows)
+
+    async def save(self):
+        rows = [(tier_name, name, data) for tier_name, tier in self.tiers.items()
+                for name, data in tier.dump().items()]
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except sqlite3.Error as e:
+            print(f"History: could not save {self.path}: {e}")
@@ -0,0 +1,67 @@
+import aiohttp
+
+from collector import env_interval
+from instances import service_instances
+from metrics import trace_config
+
+# Connection pool settings per upstream: env prefix, max open connections
+# and default total request timeout (seconds). Each can be overridden with
+# <PREFIX>_POOL_LIMIT and <PREFIX>_TIMEOUT, and per numbered instance with
+# <PREFIX>_POOL_LIMIT_<N> and <PREFIX>_TIMEOUT_<N>.
+POOLS = {
+    'plex': ('PLEX', 8, 10),
+    'qbittorrent': ('QBIT', 10, 5),
+    'sonarr': ('SONARR', 4, 5),
+    'radarr': ('RADARR', 4, 5),
+    'overseerr': ('OVERSEERR', 6, 3),
+    'images': ('IMAGE', 8, 10)
+}
+
+# Idle keep-alive connections are reused for this long, longer than the
+# fastest poll interval so steady polling never reconnects. Overridden by
+# HTTP_KEEPALIVE_TIMEOUT and HTTP_DNS_CACHE_TTL, read per session
+KEEPALIVE_TIMEOUT = 75
+DNS_CACHE_TTL = 300
+
+def pool_setting(prefix, key, number, default, parse=float):
+    # Invalid values are reported and fall back rather than keeping the
+    # upstream from ever getting a session
+    value = env_interval(f'{prefix}_{key}', default, parse)
+    if number > 1:
+        value = env_interval(f'{prefix}_{key}_{number}', value, parse)
+    return value
+
+def create_session(service, name=None, number=1):
+    # `name` labels the session's metrics, e.g. sonarr_2 for a second Sonarr
+    prefix, limit, timeout = POOLS[service]
+    connector = aiohttp.TCPConnector(
+        limit=pool_setting(prefix, 'POOL_LIMIT', number, limit, int),
+        keepalive_timeout=env_interval('HTTP_KEEPALIVE_TIMEOUT', KEEPALIVE_TIMEOUT),
+        ttl_dns_cache=env_interval('HTTP_DNS_CACHE_TTL', DNS_CACHE_TTL, int),
+        use_dns_cache=True
+    )
+    # Only qBittorrent uses cookies (its SID); it gets its own jar, unsafe so
+    # it also works when qBittorrent is addressed by IP. Nobody else keeps any.
+    if service == 'qbittorrent':
+        cookie_jar = aiohttp.CookieJar(unsafe=True)
+    else:
+        cookie_jar = aiohttp.DummyCookieJar()
+
+    return aiohttp.ClientSession(
+        connector=connector,
+        cookie_jar=cookie_jar,
+        timeout=aiohttp.ClientTimeout(total=pool_setting(prefix, 'TIMEOUT', number, timeout)),
+        trace_configs=[trace_config(name or service)]
+    )
+
+def create_sessions():
+    # One session per configured instance, keyed by instance id
+    sessions = {}
+    for service in POOLS:
+        for instance in service_instances(service):
+            sessions[instance.id] = create_session(service, instance.id, instance.number)
+    return sessions
+
+async def close_sessions(sessions):
+    for session in sessions.values():
+        await session.close()
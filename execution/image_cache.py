@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+import time
+import urllib.parse
+from collections import OrderedDict
+
+from metrics import cache_requests
+from storage import cache_dir
+
+try:
+    from PIL import Image
+except ImportError:
+    # Without Pillow images are still cached, just not downscaled
+    Image = None
+
+# Cache size; IMAGE_CACHE_MAX_MB overrides it, read when the cache is created
+IMAGE_CACHE_MAX_MB = 200
+
+# Seconds between rescans of the cache directory. With several HTTP workers
+# sharing it, each only sees its own writes in between.
+RESCAN_INTERVAL = 30
+
+# Widths the UI asks for are snapped to these so the cache doesn't fill up
+# with near-identical variants
+IMAGE_WIDTHS = (64, 200, 300, 600, 1280)
+
+TMDB_PATH = re.compile(r'^[A-Za-z0-9_-]+\.(jpg|jpeg|png|webp)$')
+
+# Artwork only: anything else under library/ (scans, metadata JSON) must
+# not be reachable with our Plex token
+PLEX_PATH = re.compile(r'^library/metadata/\d+/(thumb|art)(/\d+)?$')
+
+# Sized variants TMDB serves; the smallest at least as wide as asked for is
+# fetched rather than the original
+TMDB_SIZES = (92, 154, 185, 342, 500, 780)
+
+# Leading bytes of the formats we pass through
+IMAGE_SIGNATURES = (b'\xff\xd8\xff', b'\x89PNG', b'GIF8')
+
+def image_url(source, path, width, query=None):
+    # URL of an image served through the local /img proxy
+    params = dict(query or {})
+    params['w'] = width
+    return f"/img/{source}/{path.lstrip('/')}?{urllib.parse.urlencode(params)}"
+
+def snap_width(width):
+    for allowed in IMAGE_WIDTHS:
+        if width <= allowed:
+            return allowed
+    return IMAGE_WIDTHS[-1]
+
+def tmdb_size(width):
+    for size in TMDB_SIZES:
+        if width is not None and width <= size:
+            return f"w{size}"
+    return 'original'
+
+def upstream_image_request(source, path, query, width=None):
+    # Maps a proxied image path back to its upstream (url, headers). Paths
+    # are restricted to image locations so the proxy can't be used to reach
+    # the rest of the Plex API with our token.
+    if '..' in path:
+        return None
+
+    if source == 'plex':
+        plex_url = os.getenv('PLEX_URL')
+        plex_token = os.getenv('PLEX_TOKEN')
+        if not plex_url or not plex_token or not PLEX_PATH.match(path):
+            return None
+        return f"{plex_url.rstrip('/')}/{path}", {'X-Plex-Token': plex_token}
+
+    if source == 'plextv':
+        # User avatars, e.g. https://plex.tv/users/<id>/avatar?c=<version>
+        if not path.startswith('users/'):
+            return None
+        qs = urllib.parse.urlencode(query)
+        return f"https://plex.tv/{path}{'?' + qs if qs else ''}", {}
+
+    if source == 'tmdb':
+        if not TMDB_PATH.match(path):
+            return None
+        return f"https://image.tmdb.org/t/p/{tmdb_size(width)}/{path}", {}
+
+    return None
+
+def image_key(url, width):
+    return hashlib.sha1(f"{url}|{width}".encode()).hexdigest()
+
+def is_image(data):
+    return data.startswith(IMAGE_SIGNATURES) or (data[:4] == b'RIFF' and data[8:12] == b'WEBP')
+
+def sniff_content_type(data):
+    if data.startswith(b'\x89PNG'):
+        return 'image/png'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data.startswith(b'GIF8'):
+        return 'image/gif'
+    return 'image/jpeg'
+
+def resize_image(data, width):
+    if Image is None:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            if img.width <= width:
+                return data
+            img = img.convert('RGB')
+            img.thumbnail((width, width * 4))
+            out = io.BytesIO()
+            img.save(out, format='JPEG', quality=82, optimize=True)
+            return out.getvalue()
+    except Exception as e:
+        print(f"Image resize failed: {e}")
+        return data
+
+
+class ImageCache:
+    # Size-bounded on-disk cache of resized images. Entries are evicted least
+    # recently used first; file mtimes carry that order across restarts and
+    # between workers. Workers share the directory, so before evicting the
+    # entries are reread from it (at most every RESCAN_INTERVAL) to count
+    # the other workers' files; one evicting a file another still lists just
+    # turns that lookup into a miss.
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = self._scan()  # key -> size in bytes
+        self.total_bytes = sum(self.entries.values())
+        self._scanned = time.monotonic()
+        self._inflight = {}
+
+    def _scan(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.tmp'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue  # evicted by another worker meanwhile
+            files.append((stat.st_mtime, name, stat.st_size))
+        return OrderedDict((name, size) for _, name, size in sorted(files))
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _write(self, key, data, evicted):
+        # File work only; runs in a thread while the loop owns `entries`
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+        tmp_path = f"{self._path(key)}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+    def _account(self, key, size):
+        # Records a new entry and returns the keys evicted to make room
+        self.total_bytes += size - self.entries.pop(key, 0)
+        self.entries[key] = size
+        evicted = []
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            old_key, old_size = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+            evicted.append(old_key)
+        return evicted
+
+    async def get(self, key, loader):
+        # Returns the cached bytes for key, calling loader() to produce them on
+        # a miss. Concurrent misses for the same key share one load.
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            data = await asyncio.to_thread(self._read, key)
+            # Anything not an image was cached before responses were checked
+            if data is not None and is_image(data):
+                cache_requests.inc('images', 'hit')
+                return data
+            self.total_bytes -= self.entries.pop(key, 0)
+
+        cache_requests.inc('images', 'miss')
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader):
+        data = await loader()
+        if data is not None:
+            if time.monotonic() - self._scanned >= RESCAN_INTERVAL:
+                self._scanned = time.monotonic()
+                self.entries = await asyncio.to_thread(self._scan)
+                self.total_bytes = sum(self.entries.values())
+            evicted = self._account(key, len(data))
+            await asyncio.to_thread(self._write, key, data, evicted)
+        return data
+
+
+async def load_image(session, url, headers, width):
+    try:
+        async with session.get(url, headers=headers) as resp:
+            if resp.status != 200 or not resp.content_type.startswith('image/'):
+                return None
+            raw = await resp.read()
+    except Exception as e:
+        print(f"Image fetch failed for {url}: {e}")
+        return None
+    if not is_image(raw):
+        return None
+    return await asyncio.to_thread(resize_image, raw, width)
+
+def create_image_cache():
+    max_bytes = int(float(os.getenv('IMAGE_CACHE_MAX_MB', IMAGE_CACHE_MAX_MB)) * 1024 * 1024)
+    return ImageCache(cache_dir('images'), max_bytes)
@@ -0,0 +1,46 @@
+import os
+
+# Services that can be configured more than once: env prefix and display
+# name. The first instance uses the plain variables (SONARR_URL, ...), further
+# ones the same names with a number (SONARR_URL_2, SONARR_API_KEY_2, ...).
+# <PREFIX>_NAME[_N] sets the label an instance is shown with.
+MULTI_INSTANCE = {
+    'qbittorrent': ('QBITTORRENT', 'qBittorrent'),
+    'sonarr': ('SONARR', 'Sonarr'),
+    'radarr': ('RADARR', 'Radarr')
+}
+
+
+class Instance:
+
+    def __init__(self, service, number=1):
+        self.service = service
+        self.number = number
+        # Key for the instance's session and job names; the first instance
+        # keeps the bare service name
+        self.id = service if number == 1 else f"{service}_{number}"
+        prefix, title = MULTI_INSTANCE.get(service, (service.upper(), service.title()))
+        self.prefix = prefix
+        self.label = self.getenv('NAME') or (title if number == 1 else f"{title} {number}")
+
+    def env_name(self, key):
+        return f"{self.prefix}_{key}" if self.number == 1 else f"{self.prefix}_{key}_{self.number}"
+
+    def getenv(self, key, default=None):
+        return os.getenv(self.env_name(key), default)
+
+
+def instance_env(prefix, key, number):
+    return os.getenv(f"{prefix}_{key}" if number == 1 else f"{prefix}_{key}_{number}")
+
+def service_instances(service):
+    # The first instance always exists (unconfigured, it reports so on its
+    # card); numbered ones for as long as <PREFIX>_URL_<N> is set
+    instances = [Instance(service)]
+    if service in MULTI_INSTANCE:
+        prefix = MULTI_INSTANCE[service][0]
+        number = 2
+        while os.getenv(f"{prefix}_URL_{number}"):
+            instances.append(Instance(service, number))
+            number += 1
+    return instances
@@ -0,0 +1,44 @@
+import os
+
+try:
+    import ijson
+except ImportError:
+    # Without ijson responses are parsed whole and then trimmed, which gives
+    # the same results with a higher peak memory per poll
+    ijson = None
+
+def streaming():
+    # DASHBOARD_STREAM_JSON=0 turns incremental parsing off even when available
+    return ijson is not None and os.getenv('DASHBOARD_STREAM_JSON', '1').lower() not in ('0', 'false', 'no')
+
+SCALAR_EVENTS = frozenset(('string', 'number', 'boolean', 'null'))
+
+def json_events(resp):
+    # ijson (prefix, event, value) events for an aiohttp response body, read
+    # from the socket as they are parsed
+    return ijson.parse_async(resp.content, use_float=True)
+
+async def read_fields(resp, fields):
+    # The top-level scalar fields named in `fields` of a JSON object response
+    if not streaming():
+        data = await resp.json()
+        return {key: data[key] for key in fields if key in data}
+
+    selected = {}
+    async for prefix, event, value in json_events(resp):
+        if prefix in fields and event in SCALAR_EVENTS:
+            selected[prefix] = value
+    return selected
+
+async def read_items(resp, key, keep=None):
+    # Elements of the array under top-level `key`, built one at a time;
+    # `keep` filters them as they arrive so discarded ones are never held
+    if not streaming():
+        data = await resp.json()
+        return [item for item in data.get(key) or [] if keep is None or keep(item)]
+
+    items = []
+    async for item in ijson.items_async(resp.content, f'{key}.item', use_float=True):
+        if keep is None or keep(item):
+            items.append(item)
+    return items
@@ -0,0 +1,156 @@
+import asyncio
+import re
+import time
+
+import aiohttp
+
+# Prometheus text exposition, kept dependency-free. Metrics are module-level
+# singletons; label values are passed positionally in label-name order.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Path segments that are ids (numbers, hashes, timestamps) or file names
+# (TMDB's /t/p/w342/<hash>.jpg) are collapsed so each endpoint is one time
+# series rather than one per item
+ID_SEGMENT = re.compile(r'^(\d+|[0-9a-fA-F]{16,})$')
+FILE_SEGMENT = re.compile(r'.\.[A-Za-z0-9]{1,5}$')
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield self.name, format_labels(self.labels, label_values), value
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labels=(), collect=None):
+        super().__init__(name, help_text, labels)
+        # Optional callback returning {label_values: value}, read at scrape time
+        self.collect = collect
+
+    def set(self, *label_values, value):
+        self.values[label_values] = value
+
+    def samples(self):
+        if self.collect:
+            self.values = dict(self.collect())
+        yield from super().samples()
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value, *label_values):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def samples(self):
+        for label_values, entry in self.values.items():
+            for bound, count in zip(self.buckets, entry):
+                labels = format_labels(self.labels + ('le',), label_values + (bound,))
+                yield f'{self.name}_bucket', labels, count
+            yield f'{self.name}_bucket', format_labels(self.labels + ('le',), label_values + ('+Inf',)), entry[-1]
+            yield f'{self.name}_sum', format_labels(self.labels, label_values), entry[-2]
+            yield f'{self.name}_count', format_labels(self.labels, label_values), entry[-1]
+
+
+REGISTRY = []
+
+def register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f'# HELP {metric.name} {metric.help_text}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{labels} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+upstream_latency = register(Histogram(
+    'dashboard_upstream_request_seconds', 'Upstream HTTP request latency', ('service', 'endpoint')))
+upstream_errors = register(Counter(
+    'dashboard_upstream_errors_total', 'Upstream requests that failed or returned an error status',
+    ('service', 'endpoint', 'reason')))
+upstream_timeouts = register(Counter(
+    'dashboard_upstream_timeouts_total', 'Upstream requests that timed out', ('service', 'endpoint')))
+cache_requests = register(Counter(
+    'dashboard_cache_requests_total', 'Cache lookups by result', ('cache', 'result')))
+refresh_latency = register(Histogram(
+    'dashboard_refresh_seconds', 'Duration of each background refresh job', ('job',)))
+
+
+def normalize_segment(segment):
+    if ID_SEGMENT.match(segment):
+        return ':id'
+    if FILE_SEGMENT.search(segment):
+        return ':file'
+    return segment
+
+def normalize_endpoint(path):
+    return '/'.join(normalize_segment(segment) for segment in path.split('/')) or '/'
+
+def trace_config(service):
+    # Hooks an aiohttp session so every request it makes is timed and counted
+    # under the given service
+    config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        endpoint = normalize_endpoint(params.url.path)
+        upstream_latency.observe(time.perf_counter() - ctx.start, service, endpoint)
+        if params.response.status >= 400:
+            upstream_errors.inc(service, endpoint, str(params.response.status))
+
+    async def on_request_exception(session, ctx, params):
+        endpoint = normalize_endpoint(params.url.path)
+        upstream_latency.observe(time.perf_counter() - ctx.start, service, endpoint)
+        if isinstance(params.exception, asyncio.TimeoutError):
+            upstream_timeouts.inc(service, endpoint)
+        else:
+            upstream_errors.inc(service, endpoint, type(params.exception).__name__)
+
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    return config
@@ -0,0 +1,90 @@
+import json
+import os
+
+from fetch_plex import invalidate_recent, plex_config
+from push_listener import HEARTBEAT, PushListener
+
+# Plex pushes an event down this websocket whenever playback starts, pauses,
+# stops or progresses, and when library items are added or removed. Listening
+# to it lets Now Playing update immediately while /status/sessions is only
+# fetched when something actually changed.
+
+NOTIFICATIONS_PATH = '/:/websockets/notifications'
+
+# TimelineEntry values for library items: type 1 = Movie, 4 = Episode;
+# state 5 = finished processing (newly added), 9 = deleted
+TIMELINE_TYPES = (1, 4)
+TIMELINE_ADDED = 5
+TIMELINE_DELETED = 9
+
+SESSION_JOBS = ('plex_sessions',)
+RECENT_JOBS = ('plex_recent',)
+
+def notifications_enabled():
+    return os.getenv('PLEX_NOTIFICATIONS', '1').lower() not in ('0', 'false', 'no')
+
+
+class PlexNotificationListener(PushListener):
+    # Wakes the collector's Plex jobs when events say their data changed
+
+    name = 'Plex'
+    jobs = SESSION_JOBS
+
+    def __init__(self, collector, session):
+        super().__init__(collector, session)
+        self.states = {}  # sessionKey -> playing / paused / buffering
+
+    async def connect(self):
+        config = plex_config()
+        if not config:
+            return None
+        plex_url, plex_token = config
+        return await self.session.ws_connect(
+            f"{plex_url}{NOTIFICATIONS_PATH}",
+            headers={'X-Plex-Token': plex_token},
+            heartbeat=HEARTBEAT
+        )
+
+    def reset(self):
+        self.states.clear()
+
+    def handle(self, data):
+        try:
+            container = json.loads(data).get('NotificationContainer', {})
+        except (ValueError, AttributeError):
+            return
+
+        kind = container.get('type')
+        if kind == 'playing':
+            if self._sessions_changed(container.get('PlaySessionStateNotification', [])):
+                self.collector.trigger(*SESSION_JOBS)
+        elif kind == 'timeline':
+            entries = [e for e in container.get('TimelineEntry', []) if e.get('type') in TIMELINE_TYPES]
+            states = {e.get('state') for e in entries}
+            if TIMELINE_DELETED in states:
+                # Incremental reads only see additions; a delete needs a full one
+                invalidate_recent()
+            if states & {TIMELINE_ADDED, TIMELINE_DELETED}:
+                self.collector.trigger(*RECENT_JOBS)
+
+    def _sessions_changed(self, notifications):
+        # Progress updates arrive every few seconds per stream; only a session
+        # starting, stopping or changing state needs a fresh /status/sessions
+        changed = False
+        for notification in notifications:
+            key = notification.get('sessionKey')
+            state = notification.get('state')
+            if key is None:
+                continue
+            if state == 'stopped':
+                changed |= self.states.pop(key, None) is not None or self._is_shown(key)
+            elif self.states.get(key) != state:
+                self.states[key] = state
+                changed = True
+        return changed
+
+    def _is_shown(self, key):
+        # A stop for a session we never saw an event for (it started before we
+        # connected) still has to clear it from the card
+        sessions = (self.collector.data.get('plex') or {}).get('active_sessions') or []
+        return any(s.get('session_key') == key for s in sessions)
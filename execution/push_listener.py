@@ -0,0 +1,97 @@
+import asyncio
+from abc import ABC, abstractmethod
+
+import aiohttp
+
+# Reconnect delay after a push socket drops, doubling up to the max
+RECONNECT_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+
+HEARTBEAT = 30
+
+
+class PushListener(ABC):
+    # Base for upstream event sockets. Keeps one websocket open, hands each
+    # text message to handle() and reconnects with backoff when it drops.
+    # While connected, the collector polls `jobs` only at their slow resync
+    # interval; while disconnected they go back to normal polling.
+
+    name = 'push'
+    jobs = ()
+    # Application-level keepalive some protocols need on top of websocket pings
+    ping_interval = None
+    ping_message = None
+
+    def __init__(self, collector, session):
+        self.collector = collector
+        self.session = session
+        self.connected = False
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @abstractmethod
+    async def connect(self):
+        # Returns an open aiohttp websocket, or None when not configured
+        pass
+
+    async def on_connected(self, ws):
+        pass
+
+    @abstractmethod
+    def handle(self, data):
+        pass
+
+    def reset(self):
+        # Forget per-connection state; called on connect and disconnect
+        pass
+
+    async def _run(self):
+        delay = RECONNECT_DELAY
+        while True:
+            pinger = None
+            try:
+                ws = await self.connect()
+                if ws is None:
+                    return
+                async with ws:
+                    await self.on_connected(ws)
+                    self._set_connected(True)
+                    delay = RECONNECT_DELAY
+                    if self.ping_interval:
+                        pinger = asyncio.create_task(self._ping(ws))
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self.handle(msg.data)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"{self.name} push unavailable: {e}")
+            finally:
+                if pinger:
+                    pinger.cancel()
+                self._set_connected(False)
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send_str(self.ping_message)
+
+    def _set_connected(self, connected):
+        if connected == self.connected:
+            return
+        self.connected = connected
+        self.reset()
+        self.collector.set_pushed(self.jobs, connected)
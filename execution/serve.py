@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# ============================================================================
+# Media Dashboard — multi-worker server
+# Starts one collector process that polls the upstreams, then serves HTTP
+# from several Hypercorn worker processes that read from it, so serving
+# scales across cores without multiplying upstream traffic.
+#
+# Usage: python serve.py --workers 4
+# ============================================================================
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from dotenv import load_dotenv
+from hypercorn.config import Config
+from hypercorn.run import run
+
+from collector_service import default_socket_path
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def wait_for_socket(path, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Collector exited with status {process.returncode}")
+        try:
+            with socket.socket(socket.AF_UNIX) as sock:
+                sock.connect(path)
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Collector did not start listening on {path} within {timeout}s")
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Serve the dashboard from several worker processes.')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('DASHBOARD_WORKERS', os.cpu_count() or 1)))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 7152)))
+    parser.add_argument('--host', default='0.0.0.0')
+    args = parser.parse_args()
+
+    path = os.getenv('DASHBOARD_COLLECTOR_SOCKET') or default_socket_path()
+    # Workers inherit this and attach to the collector instead of polling
+    os.environ['DASHBOARD_COLLECTOR_SOCKET'] = path
+
+    collector = subprocess.Popen([sys.executable, os.path.join(APP_DIR, 'collector_service.py')], cwd=APP_DIR)
+    try:
+        wait_for_socket(path, collector)
+
+        config = Config()
+        config.application_path = 'app:app'
+        config.bind = [f"{args.host}:{args.port}"]
+        config.workers = args.workers
+        os.chdir(APP_DIR)
+        sys.path.insert(0, APP_DIR)
+        run(config)
+    finally:
+        collector.send_signal(signal.SIGTERM)
+        try:
+            collector.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            collector.kill()
+
+if __name__ == '__main__':
+    main()
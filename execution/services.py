@@ -0,0 +1,85 @@
+from functools import partial
+
+from fetch_plex import fetch_plex_recent, fetch_plex_sessions
+from plex_notifications import PlexNotificationListener, notifications_enabled
+from arr_push import ArrPushListener, push_enabled
+from fetch_qbittorrent import fetch_qbittorrent_data, combine_qbittorrent
+from fetch_sonarr import fetch_sonarr_health, fetch_sonarr_queue
+from fetch_radarr import fetch_radarr_health, fetch_radarr_queue
+from arr_client import combine_arr
+from instances import service_instances
+from fetch_overseerr import fetch_overseerr_data
+from collector import Collector, Job, env_interval
+from metrics import Gauge, register
+from circuit import CLOSED, HALF_OPEN, OPEN
+
+# What the background collector polls and how, shared by the single-process
+# server (app.py) and the standalone collector process (collector_service.py)
+
+def collector_jobs():
+    # Background refresh intervals in seconds, each overridable from the env.
+    # The *_ACTIVE_REFRESH values apply while something is downloading or
+    # playing; everything backs off while nobody is viewing the dashboard.
+    arr_queue = env_interval('ARR_QUEUE_REFRESH', 10)
+    arr_queue_active = env_interval('ARR_QUEUE_ACTIVE_REFRESH', 5)
+    arr_health = env_interval('ARR_HEALTH_REFRESH', 60)
+    arr_resync = env_interval('ARR_PUSH_RESYNC', 300)
+    jobs = [
+        Job('plex_sessions', 'plex', fetch_plex_sessions,
+            env_interval('PLEX_SESSIONS_REFRESH', 10), env_interval('PLEX_SESSIONS_ACTIVE_REFRESH', 3),
+            env_interval('PLEX_SESSIONS_RESYNC', 300)),
+        Job('plex_recent', 'plex', fetch_plex_recent, env_interval('PLEX_RECENT_REFRESH', 300))
+    ]
+
+    # Services configured more than once get one set of jobs per instance,
+    # all polled concurrently and merged into a single card
+    for instance in service_instances('qbittorrent'):
+        jobs.append(Job(instance.id, 'qbittorrent', partial(fetch_qbittorrent_data, instance=instance.number),
+                        env_interval('QBIT_REFRESH', 2), env_interval('QBIT_ACTIVE_REFRESH', 1),
+                        session=instance.id, instance=instance.label))
+    arr_fetchers = {
+        'sonarr': (fetch_sonarr_queue, fetch_sonarr_health),
+        'radarr': (fetch_radarr_queue, fetch_radarr_health)
+    }
+    for service, (fetch_queue, fetch_health) in arr_fetchers.items():
+        for instance in service_instances(service):
+            jobs.append(Job(f'{instance.id}_queue', service, partial(fetch_queue, instance=instance.number),
+                            arr_queue, arr_queue_active, arr_resync, session=instance.id, instance=instance.label))
+            jobs.append(Job(f'{instance.id}_health', service, partial(fetch_health, instance=instance.number),
+                            arr_health, push_interval=arr_resync, session=instance.id, instance=instance.label))
+
+    jobs.append(Job('overseerr', 'overseerr', fetch_overseerr_data, env_interval('OVERSEERR_REFRESH', 60)))
+    return jobs
+
+INSTANCE_COMBINERS = {
+    'qbittorrent': combine_qbittorrent,
+    'sonarr': combine_arr,
+    'radarr': combine_arr
+}
+
+CIRCUIT_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+def create_collector(sessions):
+    return Collector(sessions, collector_jobs(), INSTANCE_COMBINERS)
+
+
+def push_listeners(collector, sessions):
+    # Upstream event sockets that replace most polling while connected
+    listeners = []
+    if notifications_enabled():
+        listeners.append(PlexNotificationListener(collector, sessions['plex']))
+    if push_enabled():
+        for service in ('sonarr', 'radarr'):
+            for instance in service_instances(service):
+                listeners.append(ArrPushListener(collector, sessions[instance.id], instance))
+    return listeners
+
+def register_collector_metrics(get_collector, get_listeners):
+    # Gauges read from whichever process owns the collector at scrape time
+    register(Gauge('dashboard_circuit_state', 'Circuit breaker state per job (0 closed, 1 half open, 2 open)', ('job',),
+        collect=lambda: {(name,): CIRCUIT_STATE_VALUES[job.breaker.state] for name, job in get_collector().jobs.items()}
+        if get_collector() else {}))
+    register(Gauge('dashboard_connected_clients', 'Clients connected to the live update stream',
+        collect=lambda: {(): get_collector().client_count if get_collector() else 0}))
+    register(Gauge('dashboard_push_connected', 'Whether each upstream event socket is connected', ('source',),
+        collect=lambda: {(listener.name,): int(listener.connected) for listener in get_listeners()}))
@@ -0,0 +1,148 @@
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import sys
+
+from compression import MIN_COMPRESS_SIZE, accepted_encodings, brotli, etag_matches
+from storage import load_json, write_json_atomic
+
+# Serves the exported Next.js bundle. A manifest maps every URL path to its
+# file, content hash and the precompressed variants (.br/.gz) sitting next to
+# it, so a request is a dict lookup: no filesystem probing, no exceptions for
+# misses and no compression at request time. build_release.sh writes the
+# manifest and variants (python execution/static_files.py execution/static);
+# without them the manifest is built at startup and files are served
+# uncompressed.
+
+MANIFEST_NAME = 'static-manifest.json'
+
+# Next.js puts content-hashed chunks here; their URLs change with their
+# content, so browsers can keep them forever
+IMMUTABLE_PREFIX = '_next/static/'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Precompressed variants, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml',
+                      'application/xml', 'application/manifest+json')
+
+def content_type(name):
+    if name.endswith('.txt'):
+        # Next.js RSC payloads
+        return 'text/plain; charset=utf-8'
+    if name.endswith('.map'):
+        return 'application/json; charset=utf-8'
+    guessed, _ = mimetypes.guess_type(name)
+    guessed = guessed or 'application/octet-stream'
+    if guessed.startswith('text/') or guessed in ('application/javascript', 'application/json'):
+        guessed += '; charset=utf-8'
+    return guessed
+
+def page_routes(rel):
+    # Extra URL paths an exported page answers to: about.html -> about, about/
+    for suffix in ('/index.html', '.html'):
+        if rel.endswith(suffix):
+            base = rel[:-len(suffix)]
+            return [base, f"{base}/"]
+    return []
+
+def source_files(static_dir):
+    for root, _, names in os.walk(static_dir):
+        for name in names:
+            if name == MANIFEST_NAME or name.endswith(tuple(suffix for _, suffix in ENCODINGS)):
+                continue
+            path = os.path.join(root, name)
+            yield path, os.path.relpath(path, static_dir).replace(os.sep, '/')
+
+def build_manifest(static_dir):
+    files = {}
+    routes = {}
+    for path, rel in source_files(static_dir):
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=12).hexdigest()
+        files[rel] = {
+            'etag': digest,
+            'content_type': content_type(rel),
+            'encodings': [encoding for encoding, suffix in ENCODINGS if os.path.exists(path + suffix)]
+        }
+        routes[rel] = rel
+        for route in page_routes(rel):
+            routes.setdefault(route, rel)
+    return {'files': files, 'routes': routes}
+
+def precompress(static_dir):
+    # Build step: writes .gz (and .br when brotli is installed) next to every
+    # compressible file worth compressing, then the manifest
+    for path, rel in source_files(static_dir):
+        if not content_type(rel).startswith(COMPRESSIBLE_TYPES):
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            continue
+        variants = {'.gz': gzip.compress(data, compresslevel=9)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+
+    manifest = build_manifest(static_dir)
+    write_json_atomic(os.path.join(static_dir, MANIFEST_NAME), manifest)
+    return manifest
+
+
+class StaticFiles:
+
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        manifest = load_json(os.path.join(static_dir, MANIFEST_NAME)) or build_manifest(static_dir)
+        self.files = manifest['files']
+        self.routes = manifest['routes']
+        self._bodies = {}  # (file, suffix) -> bytes; the bundle is small, keep it all
+
+    def _read(self, rel, suffix):
+        with open(os.path.join(self.static_dir, rel) + suffix, 'rb') as f:
+            return f.read()
+
+    async def lookup(self, path, accept_encoding=None, if_none_match=None):
+        # (status, body, headers) for a URL path, or None when there is no
+        # such file
+        rel = self.routes.get(path.lstrip('/'))
+        if rel is None:
+            return None
+        entry = self.files[rel]
+
+        accepted = accepted_encodings(accept_encoding)
+        encoding = next((e for e, _ in ENCODINGS if e in entry['encodings'] and e in accepted), None)
+        suffix = dict(ENCODINGS)[encoding] if encoding else ''
+
+        etag = f'"{entry["etag"]}-{encoding}"' if encoding else f'"{entry["etag"]}"'
+        headers = {
+            'Content-Type': entry['content_type'],
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if rel.startswith(IMMUTABLE_PREFIX) else 'no-cache'
+        }
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        if etag_matches(if_none_match, etag):
+            return 304, b'', headers
+
+        key = (rel, suffix)
+        body = self._bodies.get(key)
+        if body is None:
+            body = self._bodies[key] = await asyncio.to_thread(self._read, rel, suffix)
+        return 200, body, headers
+
+
+if __name__ == '__main__':
+    # python static_files.py <static dir>: precompress a built bundle
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+    manifest = precompress(directory)
+    print(f"Precompressed {sum(1 for f in manifest['files'].values() if f['encodings'])} of "
+          f"{len(manifest['files'])} files in {directory}")
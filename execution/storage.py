@@ -0,0 +1,25 @@
+import json
+import os
+
+def cache_dir(*parts):
+    # Persistent caches live outside the install dir, which is root-owned and
+    # replaced on every upgrade
+    base = os.getenv('MEDIA_DASHBOARD_CACHE_DIR') or os.path.join(
+        os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'media-dashboard')
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def load_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def write_json_atomic(path, data):
+    # Write to a temp file and rename so a crash never leaves half a file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
@@ -0,0 +1,46 @@
+import { memo } from "react";
+import { ArrData, ArrItem } from "@/hooks/useDashboardData";
+import { Card } from "./Card";
+import { VirtualList } from "./VirtualList";
+
+interface ArrQueueCardProps {
+    title: string;
+    href: string;
+    data: ArrData;
+    statusClassName: string;
+}
+
+// One 34px row plus an 8px gap
+const ROW_HEIGHT = 42;
+
+// Grouped by series/movie id, which two instances can share
+const itemKey = (item: ArrItem) => `${item.instance ?? ''}:${item.id}`;
+
+export const ArrQueueCard = memo(function ArrQueueCard({ title, href, data, statusClassName }: ArrQueueCardProps) {
+    const activity = data.activity || [];
+
+    return (
+        <Card title={title} href={href} className="flex-1">
+            {activity.length === 0 ? (
+                <span className="text-slate-600 text-xs italic">Queue empty</span>
+            ) : (
+                <VirtualList
+                    items={activity}
+                    rowHeight={ROW_HEIGHT}
+                    itemKey={itemKey}
+                    className="h-full"
+                    renderItem={(item) => (
+                        <div className="h-full pb-2">
+                            <div className="h-full flex justify-between items-center text-xs bg-slate-900/50 px-2 rounded border border-white/5">
+                                <span className="truncate flex-1 pr-2">{item.title}</span>
+                                {item.instance && <span className="text-slate-500 pr-2">{item.instance}</span>}
+                                {item.count > 1 && <span className="text-slate-500 font-mono pr-2">&times;{item.count}</span>}
+                                <span className={`${statusClassName} font-mono`}>{item.status}</span>
+                            </div>
+                        </div>
+                    )}
+                />
+            )}
+        </Card>
+    );
+});
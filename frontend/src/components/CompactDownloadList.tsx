@@ -1,3 +1,4 @@
+import { memo } from "react";
 import { QBitTorrent } from "@/hooks/useDashboardData";
 
 interface CompactDownloadListProps {
@@ -5,15 +6,15 @@ interface CompactDownloadListProps {
     emptyMessage?: string;
 }
 
-export function CompactDownloadList({ downloads, emptyMessage = "No active downloads" }: CompactDownloadListProps) {
+export const CompactDownloadList = memo(function CompactDownloadList({ downloads, emptyMessage = "No active downloads" }: CompactDownloadListProps) {
     if (!downloads || downloads.length === 0) {
         return <div className="text-slate-500 text-sm italic py-2 text-center">{emptyMessage}</div>;
     }
 
     return (
         <div className="space-y-1">
-            {downloads.map((dl, i) => (
-                <div key={i} className="group relative bg-slate-800/30 hover:bg-slate-700/40 rounded-lg p-2 transition-colors">
+            {downloads.map((dl) => (
+                <div key={`${dl.instance ?? ''}:${dl.hash}`} className="group relative bg-slate-800/30 hover:bg-slate-700/40 rounded-lg p-2 transition-colors">
                     {/* Progress Bar Background */}
                     <div
                         className="absolute bottom-0 left-0 h-0.5 bg-blue-500/50 transition-all duration-500"
@@ -43,4 +44,4 @@ export function CompactDownloadList({ downloads, emptyMessage = "No active downl
             ))}
         </div>
     );
-}
+});
@@ -0,0 +1,26 @@
+import { memo } from "react";
+import { OverseerrData } from "@/hooks/useDashboardData";
+import { Card } from "./Card";
+
+interface OverseerrWidgetProps {
+    href: string;
+    data: OverseerrData;
+}
+
+export const OverseerrWidget = memo(function OverseerrWidget({ href, data }: OverseerrWidgetProps) {
+    const latest = (data.requests || [])[0];
+
+    return (
+        <Card className="shrink-0 bg-indigo-950/20 border-indigo-900/30" noPadding>
+            <a href={href} target="_blank" rel="noopener noreferrer" className="p-4 flex items-center gap-4 hover:bg-white/5 transition-colors block">
+                <div className="text-3xl font-bold text-indigo-400">{data.count || 0}</div>
+                <div className="flex-1">
+                    <div className="text-xs font-bold uppercase tracking-wider text-indigo-300/70">Requests</div>
+                    <div className="text-xs text-indigo-200/50 truncate">
+                        {latest?.title || 'No pending requests'}
+                    </div>
+                </div>
+            </a>
+        </Card>
+    );
+});
@@ -0,0 +1,30 @@
+import { memo } from "react";
+import { PlexData } from "@/hooks/useDashboardData";
+import { Card } from "./Card";
+import { PlexShelf } from "./PlexShelf";
+
+interface PlexCardProps {
+    href: string;
+    data: PlexData;
+}
+
+export const PlexCard = memo(function PlexCard({ href, data }: PlexCardProps) {
+    return (
+        <Card title="Plex" href={href} className="col-span-1 md:col-span-1 xl:row-span-2 overflow-hidden border-blue-900/20" noPadding>
+            {/* Hero: Active Session or Latest Movie */}
+            {(data.active_sessions || []).length > 0 ? (
+                <PlexShelf title="" items={data.active_sessions} type="session" variant="hero" />
+            ) : (
+                <div className="p-6 bg-gradient-to-b from-blue-950/20 to-transparent">
+                    <h2 className="text-2xl font-bold text-white mb-1">Library</h2>
+                    <p className="text-sm text-slate-400">Nothing playing right now.</p>
+                </div>
+            )}
+
+            <div className="p-5 space-y-6">
+                <PlexShelf title="Recent Movies" items={data.movies || []} type="movie" variant="grid" />
+                <PlexShelf title="Recent TV" items={data.shows || []} type="show" variant="grid" />
+            </div>
+        </Card>
+    );
+});
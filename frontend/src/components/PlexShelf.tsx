@@ -1,3 +1,4 @@
+import { memo } from "react";
 import { PlexSession, PlexItem } from "@/hooks/useDashboardData";
 
 interface PlexShelfProps {
@@ -7,7 +8,7 @@ interface PlexShelfProps {
     variant?: 'hero' | 'grid' | 'compact';
 }
 
-export function PlexShelf({ title, items, type, variant = 'grid' }: PlexShelfProps) {
+export const PlexShelf = memo(function PlexShelf({ title, items, type, variant = 'grid' }: PlexShelfProps) {
     if (!items || items.length === 0) return null;
 
     // Hero Variant (Active Sessions)
@@ -15,7 +16,7 @@ export function PlexShelf({ title, items, type, variant = 'grid' }: PlexShelfPro
         return (
             <div className="relative w-full h-64 md:h-80 lg:h-96 rounded-xl overflow-hidden group mb-4">
                 {items.map((item: any, i) => (
-                    <div key={i} className="absolute inset-0">
+                    <div key={item.session_key ?? i} className="absolute inset-0">
                         {/* Background Image with Gradient Overlay */}
                         <div
                             className="absolute inset-0 bg-cover bg-center transition-transform duration-1000 group-hover:scale-105"
@@ -47,7 +48,7 @@ export function PlexShelf({ title, items, type, variant = 'grid' }: PlexShelfPro
             <h3 className="text-xs font-bold uppercase tracking-wider text-slate-500 px-1">{title}</h3>
             <div className="grid grid-cols-3 sm:grid-cols-4 md:grid-cols-5 gap-3">
                 {items.slice(0, 10).map((item: any, i) => (
-                    <div key={i} className="group relative aspect-[2/3] bg-slate-800 rounded-lg overflow-hidden shadow-sm hover:shadow-md hover:ring-2 ring-blue-500/50 transition-all">
+                    <div key={item.id ?? i} className="group relative aspect-[2/3] bg-slate-800 rounded-lg overflow-hidden shadow-sm hover:shadow-md hover:ring-2 ring-blue-500/50 transition-all">
                         <div
                             className="absolute inset-0 bg-cover bg-center transition-transform duration-500 group-hover:scale-110"
                             style={{ backgroundImage: `url(${item.thumb})` }}
@@ -63,4 +64,4 @@ export function PlexShelf({ title, items, type, variant = 'grid' }: PlexShelfPro
             </div>
         </div>
     );
-}
+});
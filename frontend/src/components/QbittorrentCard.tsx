@@ -0,0 +1,80 @@
+import { memo } from "react";
+import { ArrowDown, ArrowUp } from "lucide-react";
+import { QBitData } from "@/hooks/useDashboardData";
+import { useHistory } from "@/hooks/useHistory";
+import { Card } from "./Card";
+import { CompactDownloadList } from "./CompactDownloadList";
+import { Sparkline } from "./Sparkline";
+
+interface QbittorrentCardProps {
+    href: string;
+    data: QBitData;
+    onShowErrors: () => void;
+}
+
+const formatSpeed = (bytes: number) => bytes > 1024 * 1024 ? `${(bytes / 1024 / 1024).toFixed(1)} MB/s` : `${(bytes / 1024).toFixed(1)} KB/s`;
+
+const formatBytes = (bytes: number) => {
+    if (!bytes) return '0 B';
+    const k = 1024;
+    const sizes = ['B', 'KB', 'MB', 'GB', 'TB'];
+    const i = Math.floor(Math.log(bytes) / Math.log(k));
+    return `${(bytes / Math.pow(k, i)).toFixed(1)} ${sizes[i]}`;
+};
+
+export const QbittorrentCard = memo(function QbittorrentCard({ href, data, onShowErrors }: QbittorrentCardProps) {
+    const dlSpeed = data.transfer_info?.dl_info_speed || 0;
+    const upSpeed = data.transfer_info?.up_info_speed || 0;
+    const dlSession = data.transfer_info?.dl_info_data || 0;
+    const upSession = data.transfer_info?.up_info_data || 0;
+    const errorCount = data.error_count || 0;
+    // Last hour of speeds, one point per minute
+    const history = useHistory('1m', 60, ['dl_speed', 'up_speed']);
+
+    return (
+        <Card title="Qbittorrent" href={href} className="flex flex-col border-emerald-900/20" noPadding>
+            {/* Speed Header */}
+            <div className="p-5 bg-slate-900/50 border-b border-white/5 grid grid-cols-2 gap-4">
+                <div>
+                    <div className="text-xs font-bold uppercase text-emerald-500/70 mb-1 flex items-center gap-1">
+                        <ArrowDown className="w-3 h-3" /> Down
+                    </div>
+                    <div className="text-2xl font-mono text-white">{formatSpeed(dlSpeed)}</div>
+                    <div className="text-xs text-slate-500 font-mono mt-1">Session: {formatBytes(dlSession)}</div>
+                    {history?.dl_speed && <Sparkline values={history.dl_speed} className="w-full h-6 mt-2 text-emerald-500/60" />}
+                </div>
+                <div>
+                    <div className="text-xs font-bold uppercase text-blue-500/70 mb-1 flex items-center gap-1">
+                        <ArrowUp className="w-3 h-3" /> Up
+                    </div>
+                    <div className="text-2xl font-mono text-white">{formatSpeed(upSpeed)}</div>
+                    <div className="text-xs text-slate-500 font-mono mt-1">Session: {formatBytes(upSession)}</div>
+                    {history?.up_speed && <Sparkline values={history.up_speed} className="w-full h-6 mt-2 text-blue-500/60" />}
+                </div>
+            </div>
+
+            <div className="p-5 flex-1 overflow-auto">
+                <div className="flex justify-between items-center mb-4">
+                    <h3 className="text-xs font-bold uppercase tracking-wider text-slate-500">Active Downloads</h3>
+                    <button
+                        onClick={onShowErrors}
+                        className={`text-xs px-2 py-1 rounded font-bold transition-colors ${errorCount > 0
+                            ? "bg-red-500/20 text-red-400 hover:bg-red-500/30 animate-pulse"
+                            : "bg-slate-800/50 text-slate-500 cursor-default"
+                            }`}
+                        disabled={errorCount === 0}
+                    >
+                        {errorCount} Errors
+                    </button>
+                </div>
+
+                <CompactDownloadList downloads={data.active_downloads || []} />
+
+                <div className="mt-8">
+                    <h3 className="text-xs font-bold uppercase tracking-wider text-slate-500 mb-3">Recent Activity</h3>
+                    <CompactDownloadList downloads={(data.recent || []).slice(0, 5)} emptyMessage="No recent activity" />
+                </div>
+            </div>
+        </Card>
+    );
+});
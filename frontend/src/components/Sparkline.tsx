@@ -0,0 +1,35 @@
+import { memo } from "react";
+
+interface SparklineProps {
+    values: (number | null)[];
+    className?: string;
+    width?: number;
+    height?: number;
+}
+
+// Minimal SVG line chart; gaps (null) break the line
+export const Sparkline = memo(function Sparkline({ values, className = "", width = 120, height = 24 }: SparklineProps) {
+    const known = values.filter((v): v is number => v !== null);
+    if (known.length < 2) return null;
+
+    const max = Math.max(...known) || 1;
+    const step = width / Math.max(1, values.length - 1);
+    let path = '';
+    let drawing = false;
+    values.forEach((value, i) => {
+        if (value === null) {
+            drawing = false;
+            return;
+        }
+        const x = (i * step).toFixed(1);
+        const y = (height - 1 - (value / max) * (height - 2)).toFixed(1);
+        path += `${drawing ? 'L' : 'M'}${x},${y}`;
+        drawing = true;
+    });
+
+    return (
+        <svg viewBox={`0 0 ${width} ${height}`} preserveAspectRatio="none" className={className} aria-hidden="true">
+            <path d={path} fill="none" stroke="currentColor" strokeWidth={1.5} vectorEffect="non-scaling-stroke" />
+        </svg>
+    );
+});
@@ -1,41 +1,93 @@
 'use client';
 
-import { useState } from 'react';
-import { X, Trash2, AlertTriangle } from 'lucide-react';
+import { memo, useMemo, useState } from 'react';
+import { X, Trash2, AlertTriangle, RefreshCw, Radio, Play, Pause } from 'lucide-react';
+import { VirtualList } from './VirtualList';
 
 interface ErrorItem {
     name: string;
     hash: string;
     state: string;
     message: string;
+    instance?: string;
+}
+
+export type TorrentAction = 'delete' | 'pause' | 'resume' | 'recheck' | 'reannounce';
+
+// What /api/torrents/action acts on: a hash on the instance it is shown under
+export interface TorrentRef {
+    instance?: string;
+    hash: string;
 }
 
 interface TorrentErrorModalProps {
     isOpen: boolean;
     onClose: () => void;
     errors: ErrorItem[];
-    onDelete: (hash: string, deleteFiles: boolean) => Promise<void>;
+    onAction: (action: TorrentAction, torrents: TorrentRef[], deleteFiles?: boolean) => Promise<void>;
 }
 
-export function TorrentErrorModal({ isOpen, onClose, errors, onDelete }: TorrentErrorModalProps) {
-    const [confirmHash, setConfirmHash] = useState<string | null>(null);
+const BULK_ACTIONS: { action: TorrentAction; label: string; icon: typeof RefreshCw }[] = [
+    { action: 'reannounce', label: 'Reannounce', icon: Radio },
+    { action: 'recheck', label: 'Recheck', icon: RefreshCw },
+    { action: 'resume', label: 'Resume', icon: Play },
+    { action: 'pause', label: 'Pause', icon: Pause },
+];
+
+// Fixed row height for the virtualized list: name, message and state, one line each
+const ROW_HEIGHT = 97;
+
+// The same hash can exist on two qBittorrent instances, so rows and the
+// selection are keyed by both
+const errorKey = (e: ErrorItem) => `${e.instance ?? ''}:${e.hash}`;
+const toRef = (e: ErrorItem): TorrentRef => ({ instance: e.instance, hash: e.hash });
+
+// Re-renders only when the errored torrents or the callbacks change, not on
+// every dashboard update
+export const TorrentErrorModal = memo(function TorrentErrorModal({ isOpen, onClose, errors, onAction }: TorrentErrorModalProps) {
+    const [selected, setSelected] = useState<Set<string>>(new Set());
+    const [confirmItems, setConfirmItems] = useState<ErrorItem[] | null>(null);
     const [deleteFiles, setDeleteFiles] = useState(false);
-    const [isDeleting, setIsDeleting] = useState(false);
+    const [isBusy, setIsBusy] = useState(false);
+
+    // Distinct tracker messages, most common first, for "select all with message"
+    const messages = useMemo(() => {
+        const counts = new Map<string, number>();
+        errors.forEach((e) => counts.set(e.message, (counts.get(e.message) || 0) + 1));
+        return [...counts.entries()].sort((a, b) => b[1] - a[1]);
+    }, [errors]);
 
     if (!isOpen) return null;
 
+    // Torrents that disappeared since they were selected drop out of the selection
+    const selectedItems = errors.filter((e) => selected.has(errorKey(e)));
+    const allSelected = errors.length > 0 && selectedItems.length === errors.length;
+
+    const toggle = (key: string) => {
+        const next = new Set(selected);
+        if (next.has(key)) next.delete(key);
+        else next.add(key);
+        setSelected(next);
+    };
+
+    const selectByMessage = (message: string) => {
+        setSelected(new Set(errors.filter((e) => e.message === message).map(errorKey)));
+    };
+
+    const runAction = async (action: TorrentAction, items: ErrorItem[], withFiles = false) => {
+        setIsBusy(true);
+        await onAction(action, items.map(toRef), withFiles);
+        setIsBusy(false);
+        setSelected(new Set());
+    };
+
     const handleConfirmDelete = async () => {
-        if (!confirmHash) return;
-        setIsDeleting(true);
-        await onDelete(confirmHash, deleteFiles);
-        setIsDeleting(false);
-        setConfirmHash(null);
+        if (!confirmItems) return;
+        await runAction('delete', confirmItems, deleteFiles);
+        setConfirmItems(null);
         setDeleteFiles(false);
-        // If no more errors, close modal? specific choice left to parent or user
     };
 
-    const selectedError = errors.find((e) => e.hash === confirmHash);
-
     return (
         <div className="fixed inset-0 z-50 flex items-center justify-center bg-black/50 backdrop-blur-sm p-4">
             <div className="bg-slate-800 rounded-xl shadow-2xl w-full max-w-lg border border-slate-700 overflow-hidden">
@@ -43,7 +95,7 @@ export function TorrentErrorModal({ isOpen, onClose, errors, onDelete }: Torrent
                 {/* Header */}
                 <div className="flex justify-between items-center p-4 border-b border-slate-700 bg-slate-800/50">
                     <h3 className="text-lg font-bold text-slate-100 flex items-center gap-2">
-                        {confirmHash ? (
+                        {confirmItems ? (
                             <>
                                 <AlertTriangle className="text-red-400 w-5 h-5" />
                                 Confirm Deletion
@@ -60,12 +112,68 @@ export function TorrentErrorModal({ isOpen, onClose, errors, onDelete }: Torrent
                     </button>
                 </div>
 
+                {/* Bulk toolbar */}
+                {!confirmItems && errors.length > 0 && (
+                    <div className="flex flex-wrap items-center gap-2 px-4 py-2 border-b border-slate-700 bg-slate-900/40 text-xs">
+                        <label className="flex items-center gap-2 text-slate-300 cursor-pointer select-none">
+                            <input
+                                type="checkbox"
+                                checked={allSelected}
+                                onChange={() => setSelected(allSelected ? new Set() : new Set(errors.map(errorKey)))}
+                                className="w-4 h-4 rounded border-slate-600 bg-slate-700"
+                            />
+                            {selectedItems.length > 0 ? `${selectedItems.length} selected` : 'Select all'}
+                        </label>
+
+                        {messages.length > 1 && (
+                            <select
+                                value=""
+                                onChange={(e) => selectByMessage(e.target.value)}
+                                className="bg-slate-700 text-slate-200 rounded px-2 py-1 max-w-[12rem] truncate"
+                            >
+                                <option value="" disabled>Select by message…</option>
+                                {messages.map(([message, count]) => (
+                                    <option key={message} value={message}>{message} ({count})</option>
+                                ))}
+                            </select>
+                        )}
+
+                        {selectedItems.length > 0 && (
+                            <div className="flex items-center gap-1 ml-auto">
+                                {BULK_ACTIONS.map(({ action, label, icon: Icon }) => (
+                                    <button
+                                        key={action}
+                                        onClick={() => runAction(action, selectedItems)}
+                                        disabled={isBusy}
+                                        title={label}
+                                        className="p-1.5 text-slate-400 hover:text-white hover:bg-slate-700 rounded transition-colors"
+                                    >
+                                        <Icon className="w-4 h-4" />
+                                    </button>
+                                ))}
+                                <button
+                                    onClick={() => setConfirmItems(selectedItems)}
+                                    disabled={isBusy}
+                                    title="Delete"
+                                    className="p-1.5 text-slate-400 hover:text-red-400 hover:bg-red-500/10 rounded transition-colors"
+                                >
+                                    <Trash2 className="w-4 h-4" />
+                                </button>
+                            </div>
+                        )}
+                    </div>
+                )}
+
                 {/* Content */}
-                <div className="p-0 max-h-[60vh] overflow-y-auto">
-                    {confirmHash && selectedError ? (
+                {confirmItems ? (
+                    <div className="max-h-[60vh] overflow-y-auto">
                         <div className="p-6 space-y-4">
                             <p className="text-slate-300">
-                                Are you sure you want to delete <strong className="text-white">{selectedError.name}</strong>?
+                                {confirmItems.length === 1 ? (
+                                    <>Are you sure you want to delete <strong className="text-white">{confirmItems[0].name}</strong>?</>
+                                ) : (
+                                    <>Are you sure you want to delete <strong className="text-white">{confirmItems.length} torrents</strong>?</>
+                                )}
                             </p>
 
                             <div className="bg-red-500/10 border border-red-500/20 rounded-lg p-3 text-red-200 text-sm">
@@ -84,52 +192,62 @@ export function TorrentErrorModal({ isOpen, onClose, errors, onDelete }: Torrent
 
                             <div className="flex gap-3 pt-2">
                                 <button
-                                    onClick={() => setConfirmHash(null)}
+                                    onClick={() => setConfirmItems(null)}
                                     className="flex-1 px-4 py-2 bg-slate-700 hover:bg-slate-600 text-white rounded-lg transition-colors font-medium"
-                                    disabled={isDeleting}
+                                    disabled={isBusy}
                                 >
                                     Cancel
                                 </button>
                                 <button
                                     onClick={handleConfirmDelete}
                                     className="flex-1 px-4 py-2 bg-red-600 hover:bg-red-500 text-white rounded-lg transition-colors font-medium flex justify-center items-center gap-2"
-                                    disabled={isDeleting}
+                                    disabled={isBusy}
                                 >
-                                    {isDeleting ? 'Deleting...' : 'Delete Forever'}
+                                    {isBusy ? 'Deleting...' : 'Delete Forever'}
                                 </button>
                             </div>
                         </div>
-                    ) : (
-                        <div className="divide-y divide-slate-700/50">
-                            {errors.length === 0 ? (
-                                <div className="p-8 text-center text-slate-500">
-                                    No errors found.
-                                </div>
-                            ) : (
-                                errors.map((err) => (
-                                    <div key={err.hash} className="p-4 hover:bg-slate-700/20 transition-colors group">
-                                        <div className="flex justify-between items-start gap-3">
-                                            <div className="min-w-0 flex-1">
-                                                <div className="font-medium text-slate-200 truncate pr-2">{err.name}</div>
-                                                <div className="text-xs text-red-400 mt-1">{err.message}</div>
-                                                <div className="text-xs text-slate-500 mt-1 uppercase tracking-wider">{err.state}</div>
-                                            </div>
-                                            <button
-                                                onClick={() => setConfirmHash(err.hash)}
-                                                className="p-2 text-slate-500 hover:text-red-400 hover:bg-red-500/10 rounded-lg transition-all opacity-0 group-hover:opacity-100 focus:opacity-100"
-                                                title="Delete Torrent"
-                                            >
-                                                <Trash2 className="w-5 h-5" />
-                                            </button>
+                    </div>
+                ) : errors.length === 0 ? (
+                    <div className="p-8 text-center text-slate-500">
+                        No errors found.
+                    </div>
+                ) : (
+                    <VirtualList
+                        items={errors}
+                        rowHeight={ROW_HEIGHT}
+                        itemKey={errorKey}
+                        className="max-h-[60vh]"
+                        renderItem={(err) => (
+                            <div className="h-full p-4 border-b border-slate-700/50 hover:bg-slate-700/20 transition-colors group">
+                                <div className="flex justify-between items-start gap-3">
+                                    <input
+                                        type="checkbox"
+                                        checked={selected.has(errorKey(err))}
+                                        onChange={() => toggle(errorKey(err))}
+                                        className="mt-1 w-4 h-4 rounded border-slate-600 bg-slate-700"
+                                    />
+                                    <div className="min-w-0 flex-1">
+                                        <div className="font-medium text-slate-200 truncate pr-2">{err.name}</div>
+                                        <div className="text-xs text-red-400 mt-1 truncate" title={err.message}>{err.message}</div>
+                                        <div className="text-xs text-slate-500 mt-1 uppercase tracking-wider">
+                                            {err.state}{err.instance && <span className="normal-case tracking-normal"> · {err.instance}</span>}
                                         </div>
                                     </div>
-                                ))
-                            )}
-                        </div>
-                    )}
-                </div>
+                                    <button
+                                        onClick={() => setConfirmItems([err])}
+                                        className="p-2 text-slate-500 hover:text-red-400 hover:bg-red-500/10 rounded-lg transition-all opacity-0 group-hover:opacity-100 focus:opacity-100"
+                                        title="Delete Torrent"
+                                    >
+                                        <Trash2 className="w-5 h-5" />
+                                    </button>
+                                </div>
+                            </div>
+                        )}
+                    />
+                )}
 
-                {!confirmHash && (
+                {!confirmItems && (
                     <div className="p-4 bg-slate-800/50 border-t border-slate-700 text-right">
                         <button onClick={onClose} className="text-sm text-slate-400 hover:text-white px-3 py-1">
                             Close
@@ -139,4 +257,4 @@ export function TorrentErrorModal({ isOpen, onClose, errors, onDelete }: Torrent
             </div>
         </div>
     );
-}
+});
@@ -0,0 +1,55 @@
+'use client';
+
+import { ReactNode, useEffect, useRef, useState } from 'react';
+
+interface VirtualListProps<T> {
+    items: T[];
+    // Every row is rendered at exactly this height (px)
+    rowHeight: number;
+    itemKey: (item: T) => string | number;
+    renderItem: (item: T) => ReactNode;
+    // Rows rendered above and below the visible window
+    overscan?: number;
+    className?: string;
+}
+
+// Scrolling list that only mounts the rows in view, so a list of hundreds of
+// entries costs the same to render as a screenful. Give it a bounded height
+// (e.g. max-h-[60vh] or h-full) through className.
+export function VirtualList<T>({ items, rowHeight, itemKey, renderItem, overscan = 5, className = '' }: VirtualListProps<T>) {
+    const ref = useRef<HTMLDivElement>(null);
+    const [scrollTop, setScrollTop] = useState(0);
+    const [viewportHeight, setViewportHeight] = useState(0);
+
+    useEffect(() => {
+        const element = ref.current;
+        if (!element) return;
+        const observer = new ResizeObserver(() => setViewportHeight(element.clientHeight));
+        observer.observe(element);
+        setViewportHeight(element.clientHeight);
+        return () => observer.disconnect();
+    }, []);
+
+    const first = Math.max(0, Math.floor(scrollTop / rowHeight) - overscan);
+    const last = Math.min(items.length, Math.ceil((scrollTop + viewportHeight) / rowHeight) + overscan);
+
+    return (
+        <div
+            ref={ref}
+            onScroll={(e) => setScrollTop(e.currentTarget.scrollTop)}
+            className={`overflow-y-auto ${className}`}
+        >
+            <div className="relative" style={{ height: items.length * rowHeight }}>
+                {items.slice(first, last).map((item, i) => (
+                    <div
+                        key={itemKey(item)}
+                        className="absolute inset-x-0"
+                        style={{ top: (first + i) * rowHeight, height: rowHeight }}
+                    >
+                        {renderItem(item)}
+                    </div>
+                ))}
+            </div>
+        </div>
+    );
+}
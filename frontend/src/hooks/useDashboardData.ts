@@ -1,6 +1,8 @@
-import useSWR from 'swr';
+import { useEffect, useState } from 'react';
+import useSWR, { useSWRConfig } from 'swr';
 
 export interface PlexSession {
+    session_key?: string;
     user: string;
     user_thumb: string;
     title: string;
@@ -10,6 +12,7 @@ export interface PlexSession {
 }
 
 export interface PlexItem {
+    id?: string;
     title: string;
     year?: string;
     episode?: string;
@@ -18,21 +21,34 @@ export interface PlexItem {
 
 export interface PlexData {
     error?: string;
+    stale_since?: number;
     active_sessions: PlexSession[];
     movies: PlexItem[];
     shows: PlexItem[];
 }
 
 export interface QBitTorrent {
+    hash: string;
     name: string;
     state: string;
     progress: string;
     dlspeed: number;
+    added_on?: number;
+    instance?: string;
+}
+
+// Present when a service has several instances and some of them are failing
+export interface InstanceError {
+    instance: string;
+    error: string;
 }
 
 export interface QBitData {
     error?: string;
+    stale_since?: number;
+    instance_errors?: InstanceError[];
     active_downloads: QBitTorrent[];
+    active_count?: number;
     recent: QBitTorrent[];
     transfer_info?: {
         dl_info_speed: number;
@@ -45,18 +61,25 @@ export interface QBitData {
 }
 
 export interface ArrItem {
+    id: number | string;
     title: string;
     status: string;
+    protocol?: string;
+    count: number;
+    instance?: string;
 }
 
 export interface ArrData {
     error?: string;
+    stale_since?: number;
+    instance_errors?: InstanceError[];
     activity: ArrItem[];
     errors: any[];
     warnings: any[];
 }
 
 export interface OverseerrRequest {
+    id: number;
     title: string;
     user: string;
     date: string;
@@ -65,6 +88,7 @@ export interface OverseerrRequest {
 
 export interface OverseerrData {
     error?: string;
+    stale_since?: number;
     count: number;
     requests: OverseerrRequest[];
 }
@@ -86,11 +110,64 @@ export interface DashboardData {
 
 const fetcher = (url: string) => fetch(url).then((res) => res.json());
 
+// Applies a JSON merge patch (RFC 7386). Only objects along changed paths are
+// copied, untouched slices keep their identity between updates.
+function applyPatch(target: any, patch: any): any {
+    if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) return patch;
+    const base = target !== null && typeof target === 'object' && !Array.isArray(target) ? target : {};
+    const result = { ...base };
+    for (const key of Object.keys(patch)) {
+        if (patch[key] === null) delete result[key];
+        else result[key] = applyPatch(base[key], patch[key]);
+    }
+    return result;
+}
+
+// Returns `next`, reusing every object of `previous` that is deeply equal to
+// its counterpart, so polled responses keep unchanged slices' identity the way
+// stream patches do and memoized cards skip re-rendering.
+function shareUnchanged(previous: any, next: any): any {
+    if (previous === next) return previous;
+    if (previous === null || next === null || typeof previous !== 'object' || typeof next !== 'object'
+        || Array.isArray(previous) !== Array.isArray(next)) return next;
+    const keys = Object.keys(next);
+    let same = keys.length === Object.keys(previous).length;
+    const result: any = Array.isArray(next) ? [] : {};
+    for (const key of keys) {
+        result[key] = shareUnchanged(previous[key], next[key]);
+        if (result[key] !== previous[key]) same = false;
+    }
+    return same ? previous : result;
+}
+
 export function useDashboardData() {
-    const { data, error, isLoading } = useSWR<DashboardData>('/api/data', fetcher, {
-        refreshInterval: 2000,
+    // While the event stream is connected it keeps the SWR cache up to date;
+    // polling only takes over when the stream is unavailable.
+    const [isStreaming, setIsStreaming] = useState(false);
+    const { cache } = useSWRConfig();
+    const poll = (url: string) => fetcher(url).then((next) => shareUnchanged(cache.get(url)?.data, next));
+    const { data, error, isLoading, mutate } = useSWR<DashboardData>('/api/data', poll, {
+        refreshInterval: isStreaming ? 0 : 2000,
     });
 
+    useEffect(() => {
+        if (typeof EventSource === 'undefined') return;
+
+        const source = new EventSource('/api/stream');
+        source.addEventListener('snapshot', (e) => {
+            mutate(JSON.parse((e as MessageEvent).data), { revalidate: false });
+            setIsStreaming(true);
+        });
+        source.addEventListener('patch', (e) => {
+            const patch = JSON.parse((e as MessageEvent).data);
+            mutate((current) => current && applyPatch(current, patch), { revalidate: false });
+        });
+        // EventSource reconnects by itself and gets a fresh snapshot when it does
+        source.onerror = () => setIsStreaming(false);
+
+        return () => source.close();
+    }, [mutate]);
+
     return {
         data,
         isLoading,
@@ -0,0 +1,26 @@
+import useSWR from 'swr';
+
+export type HistoryTier = '1s' | '1m' | '1h';
+
+export type HistoryMetric = 'dl_speed' | 'up_speed' | 'active_downloads' | 'queue' | 'plex_sessions';
+
+export interface HistoryData {
+    tier: HistoryTier;
+    step: number;
+    start: number;
+    series: Partial<Record<HistoryMetric, (number | null)[]>>;
+}
+
+const fetcher = (url: string) => fetch(url).then((res) => res.json());
+
+// Server-recorded history (see execution/history.py), refreshed once per
+// bucket of the requested tier
+export function useHistory(tier: HistoryTier, points: number, metrics: HistoryMetric[]) {
+    const refreshInterval = { '1s': 1000, '1m': 60_000, '1h': 3_600_000 }[tier];
+    const { data } = useSWR<HistoryData>(
+        `/api/history?tier=${tier}&points=${points}&metrics=${metrics.join(',')}`,
+        fetcher,
+        { refreshInterval },
+    );
+    return data?.series;
+}
@@ -1,9 +1,17 @@
 # -*- mode: python ; coding: utf-8 -*-
+#
+# MEDIA_DASHBOARD_ONEDIR=1 pyinstaller media-dashboard.spec builds a folder
+# (dist/media-dashboard/) instead of a single file. The single file unpacks
+# its libraries and assets to a temp dir on every start; the folder runs in
+# place and starts much faster.
+import os
+
+ONEDIR = os.getenv('MEDIA_DASHBOARD_ONEDIR') == '1'
 
 
 a = Analysis(
     ['execution/app.py', 'execution/fetch_plex.py', 'execution/fetch_qbittorrent.py', 'execution/fetch_sonarr.py', 'execution/fetch_radarr.py'],
-    pathex=['/home/greg/Desktop/Home Media Dashboard Workspace/execution'],
+    pathex=['execution'],
     binaries=[],
     datas=[('execution/templates', 'templates'), ('execution/static', 'static')],
     hiddenimports=['gzip', 'zlib', 'encodings', 'requests', 'urllib3', 'charset_normalizer', 'idna', 'fetch_plex', 'fetch_qbittorrent', 'fetch_sonarr', 'fetch_radarr'],
@@ -19,9 +27,9 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
+    *([] if ONEDIR else [a.binaries, a.datas]),
     [],
+    exclude_binaries=ONEDIR,
     name='media-dashboard',
     debug=False,
     bootloader_ignore_signals=False,
@@ -36,3 +44,14 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+if ONEDIR:
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=True,
+        upx_exclude=[],
+        name='media-dashboard',
+    )